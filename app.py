@@ -1,19 +1,156 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
-from markupsafe import Markup
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, has_request_context, send_file
+from flask import before_render_template, template_rendered
 import os
+import atexit
 import json
+import bisect
+import logging
+import codecs
+import csv
+import gzip
+import hashlib
+import io
+import heapq
+import importlib.util
+import math
+import random
+import queue
+import re
+import time
+import uuid
+import threading
 import smtplib
+import sqlite3
+from collections import Counter, OrderedDict, namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache, partial, wraps
+from types import MappingProxyType
 from email.message import EmailMessage
 from itsdangerous import URLSafeTimedSerializer
-import pandas as pd
+from werkzeug.datastructures import FileStorage
+from whitenoise import WhiteNoise
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class LazyModule:
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        load_analytics_modules()
+        return getattr(globals()[self.name], attr)
+
+
+np = LazyModule("np")
+pd = LazyModule("pd")
+
+
+def load_analytics_modules():
+    global np, pd
+
+    if isinstance(pd, LazyModule):
+        import numpy
+        import pandas
+
+        np, pd = numpy, pandas
+
+
+if os.getenv("LAZY_IMPORTS", "1") != "1":
+    load_analytics_modules()
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.getenv("FLASK_SECRET_KEY", "change-this-key-in-development")
+app.config["ANALYTICS_ASYNC"] = os.getenv("ANALYTICS_ASYNC", "0") == "1"
+app.config["SHEETS_ENABLED"] = bool(os.getenv("SHEETS_SPREADSHEET_ID"))
 
 serializer = URLSafeTimedSerializer(app.config["SECRET_KEY"])
 
 DATA_DIR = "data"
 STATS_FILE = os.path.join(DATA_DIR, "dashboard_stats.json")
+STATS_LOCK_FILE = os.path.join(DATA_DIR, "dashboard_stats.lock")
+CHAT_KNOWLEDGE_FILE = os.path.join(DATA_DIR, "chat_knowledge.json")
+
+ANALYTICS_PAYLOAD_VERSION = 3
+ANALYTICS_CACHE_DIR = os.path.join(DATA_DIR, "analytics_cache")
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "32"))
+ANALYTICS_DISK_CACHE_SIZE = int(os.getenv("ANALYTICS_DISK_CACHE_SIZE", "200"))
+ANALYTICS_DISK_CACHE = os.getenv("ANALYTICS_DISK_CACHE", "1") == "1"
+
+ANALYTICS_STREAM_THRESHOLD = int(os.getenv("ANALYTICS_STREAM_THRESHOLD", str(20 * 1024 * 1024)))
+ANALYTICS_CHUNK_ROWS = int(os.getenv("ANALYTICS_CHUNK_ROWS", "50000"))
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+ANALYTICS_JOBS_DIR = os.path.join(DATA_DIR, "jobs")
+ANALYTICS_UPLOADS_DIR = os.path.join(DATA_DIR, "uploads")
+ANALYTICS_JOB_WORKERS = int(os.getenv("ANALYTICS_JOB_WORKERS", "2"))
+ANALYTICS_MAX_PENDING_JOBS = int(os.getenv("ANALYTICS_MAX_PENDING_JOBS", "4"))
+ANALYTICS_JOB_TTL = int(os.getenv("ANALYTICS_JOB_TTL", str(24 * 3600)))
+
+ANALYTICS_MAX_UPLOAD_BYTES = int(os.getenv("ANALYTICS_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+CHUNKED_UPLOADS_DIR = os.path.join(DATA_DIR, "chunked_uploads")
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
+UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+UPLOAD_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+app.config["MAX_CONTENT_LENGTH"] = ANALYTICS_MAX_UPLOAD_BYTES + 1024 * 1024
+
+ANALYTICS_STATE_FILE = os.path.join(DATA_DIR, "analytics_state.json")
+ANALYTICS_STATE_IDS_FILE = os.path.join(DATA_DIR, "analytics_state_ids.txt")
+ANALYTICS_STATE_LOCK_FILE = os.path.join(DATA_DIR, "analytics_state.lock")
+
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASS = os.getenv("SMTP_PASS")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", "20"))
+FROM_EMAIL = os.getenv("FROM_EMAIL", SMTP_USER)
+
+MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", "500"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "5"))
+MAIL_RETRY_DELAY = float(os.getenv("MAIL_RETRY_DELAY", "2"))
+MAIL_IDLE_SECONDS = float(os.getenv("MAIL_IDLE_SECONDS", "30"))
+MAIL_DEAD_LETTER_FILE = os.path.join(DATA_DIR, "mail_dead_letter.jsonl")
+
+PROFILES_DIR = os.path.join(DATA_DIR, "profiles")
+PROFILES_KEEP = int(os.getenv("PROFILES_KEEP", "50"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_ID_RE = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{6}$")
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+ASSET_MANIFEST_FILE = os.path.join(STATIC_DIR, "dist", "manifest.json")
+ASSET_IMMUTABLE_RE = re.compile(r"^/static/dist/.+\.[0-9a-f]{12}\.\w+$")
+ASSET_FALLBACKS = {
+    "vendor/chart.umd.js": "https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js"
+}
+
+MAINTENANCE_FILE = os.getenv("MAINTENANCE_FILE", os.path.join(DATA_DIR, "maintenance.flag"))
+MAINTENANCE_CHECK_SECONDS = float(os.getenv("MAINTENANCE_CHECK_SECONDS", "2"))
+MAINTENANCE_ALLOWED_PREFIXES = ("/login", "/verify-secret", "/static")
+
+SHEETS_SPREADSHEET_ID = os.getenv("SHEETS_SPREADSHEET_ID", "")
+SHEETS_WORKSHEET = os.getenv("SHEETS_WORKSHEET", "")
+SHEETS_CREDENTIALS_FILE = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+SHEETS_WATERMARK_FILE = os.path.join(DATA_DIR, "sheets_watermark.json")
+SHEETS_LOCK_FILE = os.path.join(DATA_DIR, "sheets_sync.lock")
+
+HISTORY_DB_FILE = os.path.join(DATA_DIR, "history.sqlite3")
+HISTORY_SOURCES_KEEP = int(os.getenv("HISTORY_SOURCES_KEEP", str(ANALYTICS_CACHE_SIZE)))
+
+ANALYTICS_SNAPSHOTS_DIR = os.path.join(DATA_DIR, "snapshots")
+ANALYTICS_LATEST_SNAPSHOT_FILE = os.path.join(ANALYTICS_SNAPSHOTS_DIR, "latest.json")
+ANALYTICS_SNAPSHOT_KEEP = int(os.getenv("ANALYTICS_SNAPSHOT_KEEP", "10"))
+ANALYTICS_TABLE_PAGE_SIZE = int(os.getenv("ANALYTICS_TABLE_PAGE_SIZE", "50"))
+ANALYTICS_TABLE_MAX_PAGE_SIZE = 500
 
 
 # ======================================================
@@ -24,13 +161,346 @@ def ensure_data_dir():
     os.makedirs(DATA_DIR, exist_ok=True)
 
 
+@contextmanager
+def file_lock(path):
+    if fcntl is None:
+        yield
+        return
+
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def write_json_atomic(path, data, fsync=False, **dump_kwargs):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(data, ensure_ascii=False, **dump_kwargs))
+
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        os.replace(tmp_path, path)
+
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# ======================================================
+# מדידת ביצועים
+# ======================================================
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+ACCESS_LOG_LEVEL = os.getenv("ACCESS_LOG_LEVEL", "INFO").upper()
+METRIC_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    "http_request_duration_seconds": ("histogram", "Request handling time"),
+    "span_duration_seconds": ("histogram", "Time spent in instrumented code paths"),
+    "http_requests_total": ("counter", "Handled requests"),
+    "analytics_uploads_total": ("counter", "Uploaded results files"),
+    "analytics_rows_total": ("counter", "Rows aggregated from uploaded files"),
+    "analytics_cache_hits_total": ("counter", "Analytics payload cache hits"),
+    "analytics_cache_misses_total": ("counter", "Analytics payload cache misses"),
+    "analytics_errors_total": ("counter", "Failed analyses")
+}
+
+_metrics_lock = threading.Lock()
+_metric_counters = {}
+_metric_histograms = {}
+
+access_logger = logging.getLogger("app.access")
+access_logger.setLevel(ACCESS_LOG_LEVEL)
+
+if not access_logger.handlers:
+    access_log_handler = logging.StreamHandler()
+    access_log_handler.setFormatter(logging.Formatter("%(message)s"))
+    access_logger.addHandler(access_log_handler)
+    access_logger.propagate = False
+
+
+def count_metric(name, value=1, **labels):
+    key = tuple(sorted(labels.items()))
+
+    with _metrics_lock:
+        series = _metric_counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+
+def observe_metric(name, seconds, **labels):
+    key = tuple(sorted(labels.items()))
+    bucket = bisect.bisect_left(METRIC_BUCKETS, seconds)
+
+    with _metrics_lock:
+        series = _metric_histograms.setdefault(name, {})
+        entry = series.get(key)
+
+        if entry is None:
+            entry = series[key] = {"buckets": [0] * len(METRIC_BUCKETS), "sum": 0.0, "count": 0}
+
+        if bucket < len(METRIC_BUCKETS):
+            entry["buckets"][bucket] += 1
+
+        entry["sum"] += seconds
+        entry["count"] += 1
+
+
+def record_span(name, seconds):
+    observe_metric("span_duration_seconds", seconds, span=name)
+
+    if has_request_context():
+        spans = g.setdefault("spans", {})
+        spans[name] = spans.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed_span(name):
+    started = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+
+def timed(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed_span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def metric_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+
+    if not pairs:
+        return ""
+
+    escaped = (
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_metrics():
+    lines = []
+
+    with _metrics_lock:
+        counters = {name: dict(series) for name, series in _metric_counters.items()}
+        histograms = {
+            name: {key: dict(entry, buckets=list(entry["buckets"])) for key, entry in series.items()}
+            for name, series in _metric_histograms.items()
+        }
+
+    for name in sorted(set(counters) | set(histograms)):
+        kind, help_text = METRIC_HELP.get(name, ("counter" if name in counters else "histogram", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+        for key, value in sorted(counters.get(name, {}).items()):
+            lines.append(f"{name}{metric_labels(key)} {value}")
+
+        for key, entry in sorted(histograms.get(name, {}).items()):
+            cumulative = 0
+
+            for bound, count in zip(METRIC_BUCKETS, entry["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{metric_labels(key, [('le', bound)])} {cumulative}")
+
+            lines.append(f"{name}_bucket{metric_labels(key, [('le', '+Inf')])} {entry['count']}")
+            lines.append(f"{name}_sum{metric_labels(key)} {entry['sum']:.6f}")
+            lines.append(f"{name}_count{metric_labels(key)} {entry['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.spans = {}
+
+
+@app.after_request
+def log_request_timing(response):
+    started = g.pop("request_started", None)
+
+    if started is None:
+        return response
+
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or "unknown"
+
+    observe_metric("http_request_duration_seconds", elapsed, endpoint=endpoint, method=request.method)
+    count_metric("http_requests_total", endpoint=endpoint, method=request.method, status=response.status_code)
+
+    access_logger.info(json.dumps({
+        "event": "request",
+        "method": request.method,
+        "path": request.path,
+        "endpoint": endpoint,
+        "status": response.status_code,
+        "duration_ms": round(elapsed * 1000, 2),
+        "spans_ms": {name: round(seconds * 1000, 2) for name, seconds in g.get("spans", {}).items()}
+    }, ensure_ascii=False))
+
+    return response
+
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def stop_render_timer(sender, template, context, **extra):
+    started = g.pop("render_started", None)
+
+    if started is not None:
+        record_span("render", time.perf_counter() - started)
+
+
+_profile_lock = threading.Lock()
+
+
+def profiling_requested():
+    if request.headers.get("X-Profile") == "1" or request.args.get("profile") == "1":
+        return "lecturer_email" in session
+
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def save_profile(profiler, meta):
+    import pstats
+
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(PROFILES_DIR, meta["id"] + ".prof"))
+
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(30)
+    meta["top"] = report.getvalue()
+
+    write_json_atomic(os.path.join(PROFILES_DIR, meta["id"] + ".json"), meta)
+
+    names = sorted(name for name in os.listdir(PROFILES_DIR) if name.endswith(".json"))
+
+    for name in names[:-PROFILES_KEEP]:
+        for suffix in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(PROFILES_DIR, name[:-5] + suffix))
+            except OSError:
+                pass
+
+
+def run_profiled(view, args, kwargs):
+    import cProfile
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracing = tracemalloc.is_tracing()
+
+    if not tracing:
+        tracemalloc.start()
+
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+
+    try:
+        response = app.make_response(profiler.runcall(view, *args, **kwargs))
+    finally:
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+
+        if not tracing:
+            tracemalloc.stop()
+
+    upload = request.files.get("results_file")
+    meta = {
+        "id": time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6],
+        "created": time.strftime("%d/%m/%Y %H:%M:%S"),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "user": session.get("lecturer_email"),
+        "filename": upload.filename if upload else None,
+        "status": response.status_code,
+        "duration_ms": round(elapsed * 1000, 1),
+        "peak_memory_mb": round(peak / (1024 * 1024), 1)
+    }
+
+    try:
+        save_profile(profiler, meta)
+        response.headers["X-Profile-Id"] = meta["id"]
+    except OSError as e:
+        print("PROFILE ERROR:", e)
+
+    return response
+
+
+def profiled(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not profiling_requested() or not _profile_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+
+        try:
+            return run_profiled(view, args, kwargs)
+        finally:
+            _profile_lock.release()
+
+    return wrapper
+
+
+def load_profiles():
+    try:
+        names = sorted(
+            (name for name in os.listdir(PROFILES_DIR) if name.endswith(".json")),
+            reverse=True
+        )
+    except OSError:
+        return []
+
+    profiles = []
+
+    for name in names:
+        try:
+            with open(os.path.join(PROFILES_DIR, name), "r", encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+
+    return profiles
+
+
+@app.route("/metrics")
+def metrics():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return app.response_class("unauthorized\n", status=401, mimetype="text/plain")
+
+    return app.response_class(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 def safe_text(value):
     if value is None:
         return ""
 
     try:
-        if pd.isna(value):
+        if value != value:
             return ""
+    except TypeError:
+        return ""
     except Exception:
         pass
 
@@ -41,21 +511,6 @@ def normalize_column_name(value):
     return str(value).strip().replace("\n", " ").replace("\r", " ")
 
 
-def find_col(df, options):
-    clean_map = {}
-
-    for col in df.columns:
-        clean_map[normalize_column_name(col)] = col
-
-    for opt in options:
-        opt_clean = normalize_column_name(opt)
-
-        if opt_clean in clean_map:
-            return clean_map[opt_clean]
-
-    return None
-
-
 def default_dashboard_stats():
     return {
         "registered_students": 0,
@@ -68,52 +523,273 @@ def default_dashboard_stats():
     }
 
 
-def load_dashboard_stats():
-    ensure_data_dir()
+_dashboard_stats_cache = {"key": None, "stats": None}
 
-    if not os.path.exists(STATS_FILE):
+
+def stats_file_key(st):
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+@timed("stats_read")
+def load_dashboard_stats():
+    try:
+        key = stats_file_key(os.stat(STATS_FILE))
+    except OSError:
         return default_dashboard_stats()
 
+    if _dashboard_stats_cache["key"] == key:
+        return dict(_dashboard_stats_cache["stats"])
+
     try:
         with open(STATS_FILE, "r", encoding="utf-8") as f:
+            key = stats_file_key(os.fstat(f.fileno()))
             saved = json.load(f)
 
         stats = default_dashboard_stats()
         stats.update(saved)
-        return stats
 
     except Exception:
         return default_dashboard_stats()
 
+    _dashboard_stats_cache.update(key=key, stats=stats)
+    return dict(stats)
 
+
+@timed("stats_write")
 def save_dashboard_stats(stats):
     ensure_data_dir()
 
-    with open(STATS_FILE, "w", encoding="utf-8") as f:
-        json.dump(stats, f, ensure_ascii=False, indent=2)
+    with file_lock(STATS_LOCK_FILE):
+        write_json_atomic(STATS_FILE, stats, fsync=True, indent=2)
+        key = stats_file_key(os.stat(STATS_FILE))
 
+    saved = default_dashboard_stats()
+    saved.update(stats)
+    _dashboard_stats_cache.update(key=key, stats=saved)
+
+
+def uploaded_file_size(uploaded_file):
+    stream = uploaded_file.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
+def is_excel_upload(uploaded_file):
+    return (uploaded_file.filename or "").lower().endswith((".xlsx", ".xls"))
+
+
+def sniff_csv_encoding(stream):
+    head = stream.read(ENCODING_SNIFF_BYTES)
+    stream.seek(0)
+
+    try:
+        codecs.getincrementaldecoder("utf-8-sig")().decode(head, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp1255"
+
+
+def excel_engine():
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+
+    return None
+
+
+def excel_header_names(cells):
+    names = []
+    seen = Counter()
+
+    for index, cell in enumerate(cells):
+        name = f"Unnamed: {index}" if cell is None or cell == "" else cell
+
+        if seen[name]:
+            name, seen[name] = f"{name}.{seen[name]}", seen[name] + 1
+        else:
+            seen[name] = 1
+
+        names.append(name)
+
+    return names
+
+
+def excel_cell_value(value):
+    if value is None:
+        return ""
+
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+
+    return value
+
+
+def iter_xlsx_columns(worksheet, columns):
+    try:
+        from openpyxl.utils.cell import column_index_from_string
+        from openpyxl.worksheet._reader import WorkSheetParser
+    except ImportError:
+        for row in worksheet.iter_rows(min_row=2, values_only=True):
+            yield [row[i] if i < len(row) else None for i in columns], any(
+                v is not None and v != "" for v in row
+            )
+        return
+
+    wanted = {i + 1: position for position, i in enumerate(columns)}
+
+    class ColumnParser(WorkSheetParser):
+        def parse_row(self, row):
+            self.row_counter = int(row.get("r") or self.row_counter + 1)
+            self.filled = False
+            cells = []
+            column = 0
+
+            for element in row:
+                reference = element.get("r")
+                column = column_index_from_string(reference.rstrip("0123456789")) if reference else column + 1
+
+                if len(element):
+                    self.filled = True
+
+                if column in wanted:
+                    self.col_counter = column - 1
+                    cells.append(self.parse_cell(element))
+
+            return self.row_counter, cells
+
+    workbook = worksheet.parent
+    expected = 2
+
+    with worksheet._get_source() as source:
+        parser = ColumnParser(
+            source,
+            worksheet._shared_strings,
+            data_only=workbook.data_only,
+            epoch=workbook.epoch,
+            date_formats=workbook._date_formats,
+            timedelta_formats=workbook._timedelta_formats
+        )
+
+        for index, cells in parser.parse():
+            if index < 2:
+                continue
+
+            for _ in range(expected, index):
+                yield [None] * len(columns), False
+
+            values = [None] * len(columns)
+
+            for cell in cells:
+                values[wanted[cell["column"]]] = cell["value"]
+
+            expected = index + 1
+            yield values, parser.filled
+
+
+def read_xlsx_columns(stream):
+    from openpyxl import load_workbook
+    from pandas.io.parsers import TextParser
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+
+    try:
+        worksheet = workbook.worksheets[0]
+        header = excel_header_names(next(worksheet.iter_rows(max_row=1, values_only=True), ()))
+        keep = [i for i, name in enumerate(header) if normalize_column_name(name) in ANALYTICS_ALIAS_INDEX]
+        data = [[header[i] for i in keep]]
+        filled = 1
+
+        for values, row_filled in iter_xlsx_columns(worksheet, keep):
+            data.append([excel_cell_value(v) for v in values])
+
+            if row_filled:
+                filled = len(data)
+    finally:
+        workbook.close()
+
+    if not keep:
+        return header, pd.DataFrame()
+
+    return header, TextParser(data[:filled], header=0, skip_blank_lines=False).read()
 
-def read_uploaded_dataframe(uploaded_file):
-    filename = (uploaded_file.filename or "").lower()
 
-    if filename.endswith((".xlsx", ".xls")):
+def read_uploaded_excel(uploaded_file):
+    engine = excel_engine()
+
+    if engine is None and (uploaded_file.filename or "").lower().endswith(".xlsx"):
+        header, df = read_xlsx_columns(uploaded_file.stream)
+    else:
+        header = []
+
+        def is_analytics_column(name):
+            header.append(name)
+            return normalize_column_name(name) in ANALYTICS_ALIAS_INDEX
+
+        df = pd.read_excel(uploaded_file.stream, usecols=is_analytics_column, engine=engine)
+
+    matches = resolve_analytics_columns(header_signature(header))
+
+    if any(col not in matches for col in REQUIRED_ANALYTICS_COLS):
+        return pd.DataFrame(columns=header)
+
+    return df
+
+
+@timed("parse")
+def read_uploaded_dataframe(uploaded_file):
+    if is_excel_upload(uploaded_file):
         try:
-            return pd.read_excel(uploaded_file)
+            return read_uploaded_excel(uploaded_file)
         except ImportError:
             raise RuntimeError("חסרה ספריית openpyxl. הריצי בטרמינל: pip install openpyxl")
 
+    stream = uploaded_file.stream
+    encoding = sniff_csv_encoding(stream)
+
     try:
-        return pd.read_csv(uploaded_file, encoding="utf-8-sig")
+        return pd.read_csv(stream, encoding=encoding)
     except UnicodeDecodeError:
-        uploaded_file.stream.seek(0)
-        return pd.read_csv(uploaded_file, encoding="cp1255")
-
+        if encoding == "cp1255":
+            raise
+        stream.seek(0)
+        return pd.read_csv(stream, encoding="cp1255")
+
+
+def iter_uploaded_csv_chunks(uploaded_file, encoding, chunk_rows=None):
+    return pd.read_csv(
+        uploaded_file.stream,
+        encoding=encoding,
+        dtype=str,
+        chunksize=chunk_rows or ANALYTICS_CHUNK_ROWS
+    )
 
-def normalize_analytics_columns(df):
-    df = df.copy()
-    df.columns = [normalize_column_name(c) for c in df.columns]
 
-    site_col = find_col(df, [
+SITE_COL = "שם מקום ההתמחות"
+FIELD_COL = "תחום התמחות"
+SCORE_COL = "אחוז התאמה"
+MENTOR_COL = "שם המדריך/ה"
+STUDENT_ID_COL = "תעודת זהות"
+STUDENT_NAME_COL = "שם הסטודנט/ית"
+MANUAL_COL = "עודכן ידנית?"
+CITY_COL = "עיר המוסד"
+FIRST_NAME_COL = "שם פרטי"
+LAST_NAME_COL = "שם משפחה"
+
+COUNT_COL = "מספר סטודנטים"
+AVG_COL = "ממוצע התאמה"
+UNKNOWN_LABEL = "לא צוין"
+UNPLACED_LABELS = ("לא שובץ", UNKNOWN_LABEL)
+MANUAL_VALUES = ["כן", "yes", "true", "1", "עודכן"]
+
+SCORE_BINS = [-1, 59, 74, 84, 100]
+SCORE_LABELS = ["0–59", "60–74", "75–84", "85–100"]
+LOW_SCORE_LIMIT = 60
+HIGH_SCORE_LIMIT = 85
+LOW_STUDENTS_TOP = 10
+
+ANALYTICS_COLUMN_ALIASES = {
+    SITE_COL: [
         "שם מקום ההתמחות",
         "שם מקום הכשרה",
         "שם מקום ההכשרה",
@@ -124,252 +800,366 @@ def normalize_analytics_columns(df):
         "שם מוסד ההתמחות",
         "שם המוסד",
         "מוסד ההכשרה"
-    ])
-
-    field_col = find_col(df, [
+    ],
+    FIELD_COL: [
         "תחום התמחות",
         "תחום ההתמחות",
         "תחום ההתמחות במוסד",
         "תחום",
         "תחום מועדף"
-    ])
-
-    score_col = find_col(df, [
+    ],
+    SCORE_COL: [
         "אחוז התאמה",
         "ציון התאמה",
         "ציון סופי",
         "התאמה",
         "score"
-    ])
-
-    mentor_col = find_col(df, [
+    ],
+    MENTOR_COL: [
         "שם המדריך/ה",
         "שם המדריך",
         "מדריך/ה",
         "מדריך",
         "שם מנחה"
-    ])
-
-    student_id_col = find_col(df, [
+    ],
+    STUDENT_ID_COL: [
         "תעודת זהות",
         "ת\"ז הסטודנט",
         "תז הסטודנט",
         "מספר תעודת זהות",
         "ת\"ז",
         "תז"
-    ])
-
-    student_name_col = find_col(df, [
+    ],
+    STUDENT_NAME_COL: [
         "שם הסטודנט/ית",
         "שם סטודנט",
         "שם הסטודנט",
         "סטודנט/ית"
-    ])
-
-    first_name_col = find_col(df, ["שם פרטי"])
-    last_name_col = find_col(df, ["שם משפחה"])
-
-    manual_col = find_col(df, [
+    ],
+    FIRST_NAME_COL: ["שם פרטי"],
+    LAST_NAME_COL: ["שם משפחה"],
+    MANUAL_COL: [
         "עודכן ידנית?",
         "התערבות ידנית",
         "עדכון ידני",
         "שינוי ידני",
         "עודכן ידנית"
-    ])
-
-    city_col = find_col(df, [
+    ],
+    CITY_COL: [
         "עיר המוסד",
         "עיר מקום ההתמחות",
         "עיר"
-    ])
-
-    rename_map = {}
-
-    if site_col:
-        rename_map[site_col] = "שם מקום ההתמחות"
-    if field_col:
-        rename_map[field_col] = "תחום התמחות"
-    if score_col:
-        rename_map[score_col] = "אחוז התאמה"
-    if mentor_col:
-        rename_map[mentor_col] = "שם המדריך/ה"
-    if student_id_col:
-        rename_map[student_id_col] = "תעודת זהות"
-    if student_name_col:
-        rename_map[student_name_col] = "שם הסטודנט/ית"
-    if manual_col:
-        rename_map[manual_col] = "עודכן ידנית?"
-    if city_col:
-        rename_map[city_col] = "עיר המוסד"
-
-    df = df.rename(columns=rename_map)
-
-    if "שם הסטודנט/ית" not in df.columns and first_name_col and last_name_col:
-        df["שם הסטודנט/ית"] = (
-            df[first_name_col].apply(safe_text) + " " + df[last_name_col].apply(safe_text)
-        ).str.strip()
+    ]
+}
+
+REQUIRED_ANALYTICS_COLS = [SITE_COL, FIELD_COL]
+
+RENAMED_ANALYTICS_COLS = [
+    SITE_COL,
+    FIELD_COL,
+    SCORE_COL,
+    MENTOR_COL,
+    STUDENT_ID_COL,
+    STUDENT_NAME_COL,
+    MANUAL_COL,
+    CITY_COL
+]
 
-    for col in [
-        "שם מקום ההתמחות",
-        "תחום התמחות",
-        "שם המדריך/ה",
-        "שם הסטודנט/ית",
-        "תעודת זהות",
-        "עודכן ידנית?",
-        "עיר המוסד"
-    ]:
-        if col in df.columns:
-            df[col] = df[col].apply(safe_text)
-
-    if "אחוז התאמה" in df.columns:
-        df["אחוז התאמה"] = (
-            df["אחוז התאמה"]
-            .astype(str)
-            .str.replace("%", "", regex=False)
-            .str.strip()
-        )
-        df["אחוז התאמה"] = pd.to_numeric(df["אחוז התאמה"], errors="coerce")
+ColumnMatch = namedtuple("ColumnMatch", ["column", "alias"])
 
-    return df
 
+def compile_alias_index(column_aliases):
+    index = {}
 
-def build_analytics_payload(df):
-    df = normalize_analytics_columns(df)
+    for canonical, aliases in column_aliases.items():
+        for priority, alias in enumerate(aliases):
+            index.setdefault(normalize_column_name(alias), []).append((canonical, priority, alias))
 
-    required_cols = ["שם מקום ההתמחות", "תחום התמחות"]
-    missing = [c for c in required_cols if c not in df.columns]
+    return index
 
-    if missing:
-        available_cols = ", ".join([str(c) for c in df.columns])
-        raise ValueError(
-            "הקובץ לא מכיל את העמודות הדרושות: "
-            + ", ".join(missing)
-            + ". העמודות שנמצאו בקובץ הן: "
-            + available_cols
-        )
 
-    df = df.copy()
+ANALYTICS_ALIAS_INDEX = compile_alias_index(ANALYTICS_COLUMN_ALIASES)
 
-    df["שם מקום ההתמחות"] = df["שם מקום ההתמחות"].replace("", "לא צוין")
-    df["תחום התמחות"] = df["תחום התמחות"].replace("", "לא צוין")
 
-    total_rows = len(df)
+@lru_cache(maxsize=256)
+def resolve_analytics_columns(header_signature):
+    best = {}
 
-    valid_placements = df[
-        (df["שם מקום ההתמחות"] != "לא שובץ") &
-        (df["שם מקום ההתמחות"] != "לא צוין")
-    ].copy()
+    for column in header_signature:
+        for canonical, priority, alias in ANALYTICS_ALIAS_INDEX.get(column, ()):
+            current = best.get(canonical)
 
-    if "תעודת זהות" in df.columns:
-        total_students = int(df["תעודת זהות"].replace("", pd.NA).dropna().nunique())
-        if total_students == 0:
-            total_students = total_rows
-    else:
-        total_students = total_rows
+            if current is None or priority <= current[0]:
+                best[canonical] = (priority, ColumnMatch(column, alias))
 
-    placements_done = int(len(valid_placements))
-    success_rate_num = round((placements_done / total_rows) * 100, 1) if total_rows else 0
+    return MappingProxyType({canonical: match for canonical, (_, match) in best.items()})
 
-    registered_sites = int(valid_placements["שם מקום ההתמחות"].nunique()) if not valid_placements.empty else 0
 
-    if "שם המדריך/ה" in df.columns:
-        registered_mentors = int(df["שם המדריך/ה"].replace("", pd.NA).dropna().nunique())
-    else:
-        registered_mentors = 0
+def header_signature(columns):
+    return tuple(normalize_column_name(c) for c in columns)
 
-    has_score = "אחוז התאמה" in df.columns and df["אחוז התאמה"].notna().any()
 
-    if has_score:
-        score_df = df.dropna(subset=["אחוז התאמה"]).copy()
-    else:
-        score_df = pd.DataFrame()
+def clean_text_column(series):
+    values = series.to_numpy(dtype=object, copy=True)
+    values[pd.isna(values)] = ""
+    return pd.Series(values, index=series.index, dtype=object).astype(str).str.strip()
 
-    if has_score and not score_df.empty:
-        avg_score_num = round(score_df["אחוז התאמה"].mean(), 1)
-        low_score_count = int((score_df["אחוז התאמה"] < 60).sum())
-        high_score_count = int((score_df["אחוז התאמה"] >= 85).sum())
-    else:
-        avg_score_num = 0
-        low_score_count = 0
-        high_score_count = 0
 
-    if "עודכן ידנית?" in df.columns:
-        manual_values = df["עודכן ידנית?"].astype(str).str.lower().str.strip()
-        manual_count = int(manual_values.isin(["כן", "yes", "true", "1", "עודכן"]).sum())
-    else:
-        manual_count = 0
+@timed("normalize")
+def normalize_analytics_columns(df):
+    signature = header_signature(df.columns)
+    matches = resolve_analytics_columns(signature)
 
-    auto_count = max(total_rows - manual_count, 0)
+    rename_map = {
+        matches[col].column: col
+        for col in RENAMED_ANALYTICS_COLS
+        if col in matches
+    }
 
-    by_site = (
-        valid_placements
-        .groupby("שם מקום ההתמחות")
-        .size()
-        .reset_index(name="מספר סטודנטים")
-        .sort_values("מספר סטודנטים", ascending=False)
-    )
+    df = df.set_axis([rename_map.get(c, c) for c in signature], axis=1)
 
-    by_field = (
-        df
-        .groupby("תחום התמחות")
-        .size()
-        .reset_index(name="מספר סטודנטים")
-        .sort_values("מספר סטודנטים", ascending=False)
-    )
+    first_name = matches.get(FIRST_NAME_COL)
+    last_name = matches.get(LAST_NAME_COL)
 
-    if "שם המדריך/ה" in df.columns:
-        by_mentor = (
-            df[df["שם המדריך/ה"] != ""]
-            .groupby("שם המדריך/ה")
-            .size()
-            .reset_index(name="מספר סטודנטים")
-            .sort_values("מספר סטודנטים", ascending=False)
-        )
+    if STUDENT_NAME_COL not in df.columns and first_name and last_name:
+        df[STUDENT_NAME_COL] = (
+            clean_text_column(df[first_name.column]) + " " + clean_text_column(df[last_name.column])
+        ).str.strip()
+
+    for col in [
+        SITE_COL,
+        FIELD_COL,
+        MENTOR_COL,
+        STUDENT_NAME_COL,
+        STUDENT_ID_COL,
+        MANUAL_COL,
+        CITY_COL
+    ]:
+        if col in df.columns:
+            df[col] = clean_text_column(df[col])
+
+    if STUDENT_ID_COL in df.columns:
+        df[STUDENT_ID_COL] = df[STUDENT_ID_COL].str.removesuffix(".0")
+
+    if SCORE_COL in df.columns:
+        score = df[SCORE_COL]
+
+        if not pd.api.types.is_numeric_dtype(score) or pd.api.types.is_bool_dtype(score):
+            score = score.astype(str).str.replace("%", "", regex=False).str.strip()
+
+        df[SCORE_COL] = pd.to_numeric(score, errors="coerce")
+
+    return df
+
+
+def factorize_labels(values, empty_label=None):
+    codes, uniques = pd.factorize(values, sort=True)
+    uniques = np.asarray(uniques, dtype=object)
+
+    if empty_label is not None and (uniques == "").any():
+        uniques[uniques == ""] = empty_label
+        remap, uniques = pd.factorize(uniques, sort=True)
+        uniques = np.asarray(uniques, dtype=object)
+        codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+
+    return codes, uniques
+
+
+def label_counts(codes, uniques, mask=None, weights=None):
+    if mask is None:
+        mask = codes >= 0
+    else:
+        mask = mask & (codes >= 0)
+
+    return np.bincount(
+        codes[mask],
+        weights=None if weights is None else weights[mask],
+        minlength=len(uniques)
+    )
+
+
+def counts_to_dict(uniques, counts, skip=()):
+    return {
+        label: int(count)
+        for label, count in zip(uniques.tolist(), counts.tolist())
+        if count and label not in skip
+    }
+
+
+def pick_low_students(df, scores, score_mask):
+    low_positions = np.flatnonzero(score_mask & (scores < LOW_SCORE_LIMIT))
+
+    if len(low_positions) > LOW_STUDENTS_TOP:
+        low_scores = scores[low_positions]
+        kth = np.partition(low_scores, LOW_STUDENTS_TOP - 1)[LOW_STUDENTS_TOP - 1]
+        low_positions = low_positions[low_scores <= kth]
+
+    order = np.lexsort((low_positions, scores[low_positions]))[:LOW_STUDENTS_TOP]
+    low_positions = low_positions[order]
+
+    low_cols = [
+        col for col in [STUDENT_NAME_COL, SITE_COL, FIELD_COL, SCORE_COL]
+        if col in df.columns
+    ]
+    records = df.iloc[low_positions][low_cols].to_dict(orient="records")
+
+    for record in records:
+        for col in (SITE_COL, FIELD_COL):
+            if record.get(col) == "":
+                record[col] = UNKNOWN_LABEL
+
+    return [
+        (float(scores[pos]), int(pos), record)
+        for pos, record in zip(low_positions.tolist(), records)
+    ]
+
+
+@timed("aggregate")
+def aggregate_analytics_frame(df):
+    total_rows = len(df)
+
+    site_codes, site_uniques = factorize_labels(df[SITE_COL], UNKNOWN_LABEL)
+    field_codes, field_uniques = factorize_labels(df[FIELD_COL], UNKNOWN_LABEL)
+
+    site_counts = label_counts(site_codes, site_uniques)
+    field_counts = label_counts(field_codes, field_uniques)
+
+    agg = {
+        "total_rows": total_rows,
+        "student_ids": None,
+        "site_counts": counts_to_dict(site_uniques, site_counts, skip=UNPLACED_LABELS),
+        "field_counts": counts_to_dict(field_uniques, field_counts),
+        "mentor_counts": {},
+        "has_score_column": SCORE_COL in df.columns,
+        "score_sum": 0.0,
+        "score_count": 0,
+        "site_score_sums": {},
+        "site_score_counts": {},
+        "score_buckets": [0] * len(SCORE_LABELS),
+        "low_score_count": 0,
+        "high_score_count": 0,
+        "low_students": [],
+        "manual_count": 0
+    }
+
+    if STUDENT_ID_COL in df.columns:
+        ids = df[STUDENT_ID_COL]
+        agg["student_ids"] = pd.unique(ids[ids != ""])
+
+    if MENTOR_COL in df.columns:
+        mentor_codes, mentor_uniques = factorize_labels(df[MENTOR_COL])
+        mentor_counts = label_counts(mentor_codes, mentor_uniques)
+        agg["mentor_counts"] = counts_to_dict(mentor_uniques, mentor_counts, skip=("",))
+
+    if agg["has_score_column"]:
+        scores = df[SCORE_COL].to_numpy(dtype="float64", na_value=np.nan)
+        score_mask = ~np.isnan(scores)
+        valid_scores = scores[score_mask]
+
+        if len(valid_scores):
+            site_score_counts = label_counts(site_codes, site_uniques, score_mask)
+            site_sums = pd.Series(valid_scores).groupby(site_codes[score_mask]).sum()
+
+            buckets = np.searchsorted(SCORE_BINS, valid_scores, side="left") - 1
+            in_range = (valid_scores > SCORE_BINS[0]) & (valid_scores <= SCORE_BINS[-1])
+
+            agg.update({
+                "score_sum": float(valid_scores.sum()),
+                "score_count": int(len(valid_scores)),
+                "site_score_sums": {
+                    site_uniques[code]: float(total)
+                    for code, total in site_sums.items()
+                    if code >= 0
+                },
+                "site_score_counts": counts_to_dict(site_uniques, site_score_counts),
+                "score_buckets": np.bincount(
+                    buckets[in_range], minlength=len(SCORE_LABELS)
+                ).tolist(),
+                "low_score_count": int((valid_scores < LOW_SCORE_LIMIT).sum()),
+                "high_score_count": int((valid_scores >= HIGH_SCORE_LIMIT).sum()),
+                "low_students": pick_low_students(df, scores, score_mask)
+            })
+
+    if MANUAL_COL in df.columns:
+        manual_values = df[MANUAL_COL].astype(str).str.lower().str.strip()
+        agg["manual_count"] = int(manual_values.isin(MANUAL_VALUES).sum())
+
+    return agg
+
+
+def count_table(counts, label_col):
+    return pd.DataFrame({
+        label_col: list(counts.keys()),
+        COUNT_COL: pd.Series(list(counts.values()), dtype="int64")
+    }).sort_values(COUNT_COL, ascending=False)
+
+
+@timed("format")
+def format_analytics_payload(agg):
+    total_rows = agg["total_rows"]
+
+    if agg["student_ids"] is not None:
+        total_students = int(len(agg["student_ids"]))
+        if total_students == 0:
+            total_students = total_rows
+    else:
+        total_students = total_rows
+
+    placements_done = int(sum(agg["site_counts"].values()))
+    success_rate_num = round((placements_done / total_rows) * 100, 1) if total_rows else 0
+
+    registered_sites = len(agg["site_counts"])
+    registered_mentors = len(agg["mentor_counts"])
+
+    has_score = agg["has_score_column"] and agg["score_count"] > 0
+
+    if has_score:
+        avg_score_num = round(np.float64(agg["score_sum"]) / agg["score_count"], 1)
     else:
-        by_mentor = pd.DataFrame(columns=["שם המדריך/ה", "מספר סטודנטים"])
-
-    if has_score and not score_df.empty:
-        score_avg = (
-            score_df
-            .groupby("שם מקום ההתמחות")["אחוז התאמה"]
-            .mean()
-            .round(1)
-            .reset_index(name="ממוצע התאמה")
-            .sort_values("ממוצע התאמה", ascending=False)
+        avg_score_num = 0
+
+    manual_count = agg["manual_count"]
+    auto_count = max(total_rows - manual_count, 0)
+
+    by_site = count_table(agg["site_counts"], SITE_COL)
+    by_field = count_table(agg["field_counts"], FIELD_COL)
+    by_mentor = count_table(agg["mentor_counts"], MENTOR_COL)
+
+    if has_score:
+        site_labels = list(agg["site_score_counts"].keys())
+        site_means = (
+            pd.Series(
+                [agg["site_score_sums"][label] for label in site_labels], dtype="float64"
+            )
+            / pd.Series(
+                [agg["site_score_counts"][label] for label in site_labels], dtype="float64"
+            )
         )
 
+        score_avg = pd.DataFrame({
+            SITE_COL: site_labels,
+            AVG_COL: site_means.round(1)
+        }).sort_values(AVG_COL, ascending=False)
+
         score_avg_table = score_avg.copy()
-        score_avg_table["ממוצע התאמה"] = score_avg_table["ממוצע התאמה"].astype(str) + "%"
-
-        bins = [-1, 59, 74, 84, 100]
-        labels = ["0–59", "60–74", "75–84", "85–100"]
-        score_categories = pd.cut(score_df["אחוז התאמה"], bins=bins, labels=labels)
-        score_dist = score_categories.value_counts().reindex(labels, fill_value=0)
-
-        low_cols = []
-        for col in ["שם הסטודנט/ית", "שם מקום ההתמחות", "תחום התמחות", "אחוז התאמה"]:
-            if col in score_df.columns:
-                low_cols.append(col)
-
-        low_students = (
-            score_df[score_df["אחוז התאמה"] < 60][low_cols]
-            .sort_values("אחוז התאמה", ascending=True)
-            .head(10)
-        )
+        score_avg_table[AVG_COL] = score_avg_table[AVG_COL].astype(str) + "%"
+
+        score_dist = pd.Series(agg["score_buckets"], index=SCORE_LABELS, dtype="int64")
+        low_students = [record for _, _, record in agg["low_students"]]
     else:
-        score_avg = pd.DataFrame(columns=["שם מקום ההתמחות", "ממוצע התאמה"])
-        score_avg_table = pd.DataFrame(columns=["שם מקום ההתמחות", "ממוצע התאמה"])
+        score_avg = pd.DataFrame(columns=[SITE_COL, AVG_COL])
+        score_avg_table = pd.DataFrame(columns=[SITE_COL, AVG_COL])
         score_dist = pd.Series([], dtype=int)
-        low_students = pd.DataFrame()
+        low_students = []
 
-    most_popular_site = by_site.iloc[0]["שם מקום ההתמחות"] if not by_site.empty else "אין נתונים"
-    most_popular_field = by_field.iloc[0]["תחום התמחות"] if not by_field.empty else "אין נתונים"
+    most_popular_site = by_site.iloc[0][SITE_COL] if not by_site.empty else "אין נתונים"
+    most_popular_field = by_field.iloc[0][FIELD_COL] if not by_field.empty else "אין נתונים"
 
     if has_score and not score_avg.empty:
         best_avg_text = (
-            str(score_avg.iloc[0]["שם מקום ההתמחות"])
+            str(score_avg.iloc[0][SITE_COL])
             + " ("
-            + str(score_avg.iloc[0]["ממוצע התאמה"])
+            + str(score_avg.iloc[0][AVG_COL])
             + "%)"
         )
     else:
@@ -384,151 +1174,2051 @@ def build_analytics_payload(df):
         "avg_score": f"{avg_score_num}%",
         "manual_count": manual_count,
         "auto_count": auto_count,
-        "low_score_count": low_score_count,
-        "high_score_count": high_score_count,
+        "low_score_count": agg["low_score_count"],
+        "high_score_count": agg["high_score_count"],
         "most_popular_site": most_popular_site,
         "most_popular_field": most_popular_field,
         "best_avg_text": best_avg_text
     }
 
-    tables = {
-        "by_site": by_site.to_dict(orient="records"),
-        "by_field": by_field.to_dict(orient="records"),
-        "by_mentor": by_mentor.to_dict(orient="records"),
-        "score_avg": score_avg_table.to_dict(orient="records"),
-        "low_students": low_students.to_dict(orient="records") if not low_students.empty else []
-    }
+    tables = {
+        "by_site": by_site.to_dict(orient="records"),
+        "by_field": by_field.to_dict(orient="records"),
+        "by_mentor": by_mentor.to_dict(orient="records"),
+        "score_avg": score_avg_table.to_dict(orient="records"),
+        "low_students": low_students
+    }
+
+    charts = {
+        "site_labels": by_site[SITE_COL].tolist(),
+        "site_values": by_site[COUNT_COL].astype(int).tolist(),
+
+        "field_labels": by_field[FIELD_COL].tolist(),
+        "field_values": by_field[COUNT_COL].astype(int).tolist(),
+
+        "mentor_labels": by_mentor[MENTOR_COL].tolist()[:10] if not by_mentor.empty else [],
+        "mentor_values": by_mentor[COUNT_COL].astype(int).tolist()[:10] if not by_mentor.empty else [],
+
+        "avg_labels": score_avg[SITE_COL].tolist() if not score_avg.empty else [],
+        "avg_values": score_avg[AVG_COL].astype(float).tolist() if not score_avg.empty else [],
+
+        "score_labels": list(score_dist.index.astype(str)) if len(score_dist) else [],
+        "score_values": [int(v) for v in score_dist.tolist()] if len(score_dist) else [],
+
+        "manual_labels": ["שיבוץ אוטומטי", "עודכן ידנית"],
+        "manual_values": [auto_count, manual_count]
+    }
+
+    return summary, tables, charts
+
+
+class AnalyticsAccumulator:
+    def __init__(self):
+        self.total_rows = 0
+        self.student_ids = None
+        self.site_counts = Counter()
+        self.field_counts = Counter()
+        self.mentor_counts = Counter()
+        self.has_score_column = False
+        self.score_sum = 0.0
+        self.score_count = 0
+        self.site_score_sums = Counter()
+        self.site_score_counts = Counter()
+        self.score_buckets = [0] * len(SCORE_LABELS)
+        self.low_score_count = 0
+        self.high_score_count = 0
+        self.low_students = []
+        self.manual_count = 0
+        self.cohort = None
+
+    def add_frame(self, df):
+        count_metric("analytics_rows_total", len(df))
+        self.merge(aggregate_analytics_frame(df))
+
+    def merge(self, agg):
+        row_offset = self.total_rows
+        self.total_rows += agg["total_rows"]
+
+        if agg["student_ids"] is not None:
+            if self.student_ids is None:
+                self.student_ids = set()
+            self.student_ids.update(agg["student_ids"])
+
+        self.site_counts.update(agg["site_counts"])
+        self.field_counts.update(agg["field_counts"])
+        self.mentor_counts.update(agg["mentor_counts"])
+
+        self.has_score_column = self.has_score_column or agg["has_score_column"]
+        self.score_sum += agg["score_sum"]
+        self.score_count += agg["score_count"]
+        self.site_score_sums.update(agg["site_score_sums"])
+        self.site_score_counts.update(agg["site_score_counts"])
+        self.score_buckets = [a + b for a, b in zip(self.score_buckets, agg["score_buckets"])]
+        self.low_score_count += agg["low_score_count"]
+        self.high_score_count += agg["high_score_count"]
+        self.manual_count += agg["manual_count"]
+
+        self.low_students = heapq.nsmallest(
+            LOW_STUDENTS_TOP,
+            self.low_students + [
+                (score, row + row_offset, record)
+                for score, row, record in agg["low_students"]
+            ],
+            key=lambda item: (item[0], item[1])
+        )
+
+    def result(self):
+        return {
+            "total_rows": self.total_rows,
+            "student_ids": self.student_ids,
+            "site_counts": dict(sorted(self.site_counts.items())),
+            "field_counts": dict(sorted(self.field_counts.items())),
+            "mentor_counts": dict(sorted(self.mentor_counts.items())),
+            "has_score_column": self.has_score_column,
+            "score_sum": self.score_sum,
+            "score_count": self.score_count,
+            "site_score_sums": dict(sorted(self.site_score_sums.items())),
+            "site_score_counts": dict(sorted(self.site_score_counts.items())),
+            "score_buckets": list(self.score_buckets),
+            "low_score_count": self.low_score_count,
+            "high_score_count": self.high_score_count,
+            "low_students": list(self.low_students),
+            "manual_count": self.manual_count
+        }
+
+    def to_state(self):
+        state = self.result()
+        state["student_ids"] = None
+        state["has_student_ids"] = self.student_ids is not None
+        state["low_students"] = [list(item) for item in self.low_students]
+        state["cohort"] = self.cohort
+        return state
+
+    @classmethod
+    def from_state(cls, state, student_ids=()):
+        accumulator = cls()
+        accumulator.merge(dict(
+            state,
+            student_ids=student_ids if state.get("has_student_ids") else None,
+            low_students=[tuple(item) for item in state["low_students"]]
+        ))
+        accumulator.cohort = state.get("cohort")
+        return accumulator
+
+
+def prepare_analytics_frame(df):
+    df = normalize_analytics_columns(df)
+
+    missing = [c for c in REQUIRED_ANALYTICS_COLS if c not in df.columns]
+
+    if missing:
+        available_cols = ", ".join([str(c) for c in df.columns])
+        raise ValueError(
+            "הקובץ לא מכיל את העמודות הדרושות: "
+            + ", ".join(missing)
+            + ". העמודות שנמצאו בקובץ הן: "
+            + available_cols
+        )
+
+    return df
+
+
+def build_analytics_payload(df):
+    df = prepare_analytics_frame(df)
+    return format_analytics_payload(aggregate_analytics_frame(df))
+
+
+def accumulate_csv_chunks(uploaded_file, encoding, progress=None, on_frame=None):
+    accumulator = AnalyticsAccumulator()
+    size = uploaded_file_size(uploaded_file) or 1
+
+    for chunk in iter_uploaded_csv_chunks(uploaded_file, encoding):
+        chunk = prepare_analytics_frame(chunk)
+        accumulator.add_frame(chunk)
+
+        if on_frame:
+            on_frame(chunk)
+
+        if progress:
+            progress(min(uploaded_file.stream.tell() / size, 1.0))
+
+    return accumulator
+
+
+def stream_analytics_state(uploaded_file, progress=None, history=None):
+    encoding = sniff_csv_encoding(uploaded_file.stream)
+    on_frame = history.add_frame if history else None
+
+    try:
+        return accumulate_csv_chunks(uploaded_file, encoding, progress, on_frame)
+    except UnicodeDecodeError:
+        if encoding == "cp1255":
+            raise
+        uploaded_file.stream.seek(0)
+
+        if history:
+            history.clear_rows()
+
+        return accumulate_csv_chunks(uploaded_file, "cp1255", progress, on_frame)
+
+
+def compute_analytics_state(uploaded_file, progress=None, history=None):
+    if (
+        not is_excel_upload(uploaded_file)
+        and uploaded_file_size(uploaded_file) > ANALYTICS_STREAM_THRESHOLD
+    ):
+        return stream_analytics_state(uploaded_file, progress, history)
+
+    df = prepare_analytics_frame(read_uploaded_dataframe(uploaded_file))
+
+    if progress:
+        progress(0.5)
+
+    accumulator = AnalyticsAccumulator()
+    accumulator.add_frame(df)
+
+    if history:
+        history.add_frame(df)
+
+    return accumulator
+
+
+def compute_analytics_payload(uploaded_file, progress=None):
+    return format_analytics_payload(compute_analytics_state(uploaded_file, progress).result())
+
+
+def build_dashboard_stats(summary):
+    return {
+        "registered_students": summary["total_students"],
+        "registered_mentors": summary["registered_mentors"],
+        "registered_sites": summary["registered_sites"],
+        "success_rate": summary["success_rate"],
+        "placements_done": summary["placements_done"],
+        "avg_score": summary["avg_score"],
+        "last_update": datetime.now().strftime("%d/%m/%Y %H:%M")
+    }
+
+
+# ======================================================
+# מטמון תוצאות ניתוח
+# ======================================================
+
+_analytics_cache = OrderedDict()
+_analytics_cache_lock = threading.Lock()
+
+
+def analytics_cache_key(uploaded_file):
+    kind = "excel" if is_excel_upload(uploaded_file) else "csv"
+
+    digest = hashlib.sha256()
+    stream = uploaded_file.stream
+    stream.seek(0)
+
+    for block in iter(lambda: stream.read(1024 * 1024), b""):
+        digest.update(block)
+
+    stream.seek(0)
+    return f"v{ANALYTICS_PAYLOAD_VERSION}-{kind}-{digest.hexdigest()}"
+
+
+def analytics_cache_path(cache_key):
+    return os.path.join(ANALYTICS_CACHE_DIR, cache_key + ".json")
+
+
+def analytics_cache_state_path(cache_key):
+    return os.path.join(ANALYTICS_CACHE_DIR, cache_key + ".state.json")
+
+
+def get_cached_analytics(cache_key):
+    with _analytics_cache_lock:
+        entry = _analytics_cache.get(cache_key)
+
+        if entry is not None:
+            _analytics_cache.move_to_end(cache_key)
+            return entry + ("memory",)
+
+    if not ANALYTICS_DISK_CACHE:
+        return None
+
+    path = analytics_cache_path(cache_key)
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        with open(analytics_cache_state_path(cache_key), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = None
+
+    payload = (saved["summary"], saved["tables"], saved["charts"])
+    remember_analytics(cache_key, payload, state)
+    return payload, state, "disk"
+
+
+def remember_analytics(cache_key, payload, state=None):
+    with _analytics_cache_lock:
+        _analytics_cache[cache_key] = (payload, state)
+        _analytics_cache.move_to_end(cache_key)
+
+        while len(_analytics_cache) > ANALYTICS_CACHE_SIZE:
+            _analytics_cache.popitem(last=False)
+
+
+def store_cached_analytics(cache_key, payload, accumulator=None):
+    state = None
+
+    if accumulator is not None:
+        state = accumulator.to_state()
+        state["student_ids"] = sorted(map(str, accumulator.student_ids or ()))
+
+    remember_analytics(cache_key, payload, state)
+
+    if not ANALYTICS_DISK_CACHE:
+        return
+
+    summary, tables, charts = payload
+
+    try:
+        os.makedirs(ANALYTICS_CACHE_DIR, exist_ok=True)
+
+        if state is not None:
+            write_json_atomic(analytics_cache_state_path(cache_key), state, default=str)
+
+        write_json_atomic(
+            analytics_cache_path(cache_key),
+            {"summary": summary, "tables": tables, "charts": charts},
+            default=str
+        )
+        prune_analytics_disk_cache()
+
+    except OSError as e:
+        print("ANALYTICS CACHE ERROR:", e)
+
+
+def prune_analytics_disk_cache():
+    entries = [
+        os.path.join(ANALYTICS_CACHE_DIR, name)
+        for name in os.listdir(ANALYTICS_CACHE_DIR)
+        if name.endswith(".json") and not name.endswith(".state.json")
+    ]
+
+    if len(entries) <= ANALYTICS_DISK_CACHE_SIZE:
+        return
+
+    entries.sort(key=os.path.getmtime)
+
+    for path in entries[:len(entries) - ANALYTICS_DISK_CACHE_SIZE]:
+        for stale in (path, path[:-len(".json")] + ".state.json"):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def restore_cached_analysis(cache_key, cohort):
+    cached = get_cached_analytics(cache_key)
+
+    if cached is None or cached[1] is None:
+        count_metric("analytics_cache_misses_total")
+        return None
+
+    payload, state, tier = cached
+    accumulator = AnalyticsAccumulator.from_state(state, state["student_ids"] or ())
+    accumulator.cohort = cohort
+
+    if not history_has_source(cohort, cache_key):
+        if not history_has_copy(cache_key):
+            count_metric("analytics_cache_misses_total")
+            return None
+
+        HistoryRecorder(cohort, source=cache_key, replay=True).finish(accumulator.result())
+
+    ensure_data_dir()
+
+    with file_lock(ANALYTICS_STATE_LOCK_FILE):
+        save_analytics_state(accumulator)
+
+    count_metric("analytics_cache_hits_total", tier=tier)
+    return payload
+
+
+def analyze_full_file(uploaded_file, cache_key, cohort, progress=None):
+    history = HistoryRecorder(cohort, source=cache_key)
+
+    try:
+        accumulator = compute_analytics_state(uploaded_file, progress, history)
+        accumulator.cohort = cohort
+        payload = format_analytics_payload(accumulator.result())
+    except Exception:
+        history.abort()
+        raise
+
+    history.finish(accumulator.result())
+    store_cached_analytics(cache_key, payload, accumulator)
+    ensure_data_dir()
+
+    with file_lock(ANALYTICS_STATE_LOCK_FILE):
+        save_analytics_state(accumulator)
+
+    return payload
+
+
+def analyze_results_file(uploaded_file, append=False, cohort=None):
+    count_metric("analytics_uploads_total", mode="append" if append else "full")
+
+    if append:
+        return publish_analytics_results(append_results_file(uploaded_file, cohort))
+
+    cohort = cohort or default_cohort_label()
+    cache_key = analytics_cache_key(uploaded_file)
+    payload = restore_cached_analysis(cache_key, cohort)
+
+    if payload is None:
+        payload = analyze_full_file(uploaded_file, cache_key, cohort)
+
+    return publish_analytics_results(payload)
+
+
+# ======================================================
+# מצב מצטבר לעדכון ניתוח בתוספות
+# ======================================================
+
+_analytics_state = {"key": None, "accumulator": None}
+
+
+def analytics_state_key():
+    keys = []
+
+    for path in (ANALYTICS_STATE_FILE, ANALYTICS_STATE_IDS_FILE):
+        try:
+            keys.append(stats_file_key(os.stat(path)))
+        except OSError:
+            keys.append(None)
+
+    return tuple(keys)
+
+
+def load_analytics_state():
+    key = analytics_state_key()
+
+    if _analytics_state["key"] == key and _analytics_state["accumulator"] is not None:
+        return _analytics_state["accumulator"]
+
+    try:
+        with open(ANALYTICS_STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return AnalyticsAccumulator()
+
+    student_ids = ()
+
+    if state.get("has_student_ids"):
+        try:
+            with open(ANALYTICS_STATE_IDS_FILE, "r", encoding="utf-8") as f:
+                student_ids = [student_id.removesuffix(".0") for student_id in f.read().splitlines()]
+        except OSError:
+            pass
+
+    accumulator = AnalyticsAccumulator.from_state(state, student_ids)
+    _analytics_state.update(key=key, accumulator=accumulator)
+    return accumulator
+
+
+def save_analytics_state(accumulator, added_ids=None):
+    ensure_data_dir()
+
+    if added_ids is None:
+        ids_tmp = ANALYTICS_STATE_IDS_FILE + ".tmp"
+
+        with open(ids_tmp, "w", encoding="utf-8") as f:
+            for student_id in accumulator.student_ids or ():
+                f.write(str(student_id) + "\n")
+
+        os.replace(ids_tmp, ANALYTICS_STATE_IDS_FILE)
+
+    elif added_ids:
+        with open(ANALYTICS_STATE_IDS_FILE, "a", encoding="utf-8") as f:
+            f.write("\n".join(map(str, added_ids)) + "\n")
+
+    write_json_atomic(ANALYTICS_STATE_FILE, accumulator.to_state(), default=str)
+    _analytics_state.update(key=analytics_state_key(), accumulator=accumulator)
+
+
+def clear_analytics_state():
+    _analytics_state.update(key=None, accumulator=None)
+
+    for path in (ANALYTICS_STATE_FILE, ANALYTICS_STATE_IDS_FILE):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def drop_known_students(df, known_ids):
+    if STUDENT_ID_COL not in df.columns:
+        return df, []
+
+    if known_ids is None:
+        return df, None
+
+    ids = df[STUDENT_ID_COL]
+    has_id = (ids != "").to_numpy()
+    seen = np.fromiter((i in known_ids for i in ids), dtype=bool, count=len(ids))
+    keep = ~(has_id & (seen | ids.duplicated().to_numpy()))
+
+    df = df[keep]
+    added_ids = pd.unique(df[STUDENT_ID_COL][has_id[keep]]).tolist()
+    return df, added_ids
+
+
+def append_results_file(uploaded_file, cohort=None):
+    return append_results_frame(read_uploaded_dataframe(uploaded_file), cohort)
+
+
+def append_results_frame(df, cohort=None):
+    df = prepare_analytics_frame(df)
+    ensure_data_dir()
+
+    with file_lock(ANALYTICS_STATE_LOCK_FILE):
+        accumulator = load_analytics_state()
+
+        if not accumulator.total_rows:
+            accumulator = AnalyticsAccumulator()
+            accumulator.cohort = cohort or default_cohort_label()
+            history = HistoryRecorder(accumulator.cohort)
+
+            try:
+                accumulator.add_frame(df)
+                history.add_frame(df)
+            except Exception:
+                history.abort()
+                raise
+
+            history.finish(accumulator.result())
+            save_analytics_state(accumulator)
+            return format_analytics_payload(accumulator.result())
+
+        if cohort and accumulator.cohort and cohort != accumulator.cohort:
+            raise ValueError(
+                f"הניתוח הקיים שייך למחזור {accumulator.cohort}. "
+                f"כדי לנתח את מחזור {cohort} העלי קובץ מלא בלי לסמן הוספה לניתוח הקיים."
+            )
+
+        df, added_ids = drop_known_students(df, accumulator.student_ids)
+        history = HistoryRecorder(accumulator.cohort or cohort or default_cohort_label(), append=True)
+
+        try:
+            if len(df):
+                accumulator.add_frame(df)
+                history.add_frame(df)
+
+            history.finish(accumulator.result())
+            save_analytics_state(accumulator, added_ids)
+        except Exception:
+            _analytics_state.update(key=None, accumulator=None)
+            history.abort()
+            raise
+
+    return format_analytics_payload(accumulator.result())
+
+
+# ======================================================
+# סנכרון מגיליון Google
+# ======================================================
+
+def column_letter(index):
+    letters = ""
+    index += 1
+
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(ord("A") + rest) + letters
+
+    return letters
+
+
+def column_index(letters):
+    index = 0
+
+    for char in letters:
+        index = index * 26 + ord(char) - ord("A") + 1
+
+    return index - 1
+
+
+_sheets = {"pid": None, "worksheet": None}
+_sheets_lock = threading.Lock()
+
+
+def sheets_worksheet():
+    with _sheets_lock:
+        if _sheets["worksheet"] is not None and _sheets["pid"] == os.getpid():
+            return _sheets["worksheet"]
+
+        if not SHEETS_SPREADSHEET_ID:
+            raise RuntimeError("לא הוגדר גיליון Google לסנכרון (SHEETS_SPREADSHEET_ID).")
+
+        import gspread
+
+        if SHEETS_CREDENTIALS_FILE:
+            client = gspread.service_account(filename=SHEETS_CREDENTIALS_FILE)
+        else:
+            client = gspread.service_account()
+
+        spreadsheet = client.open_by_key(SHEETS_SPREADSHEET_ID)
+        worksheet = spreadsheet.worksheet(SHEETS_WORKSHEET) if SHEETS_WORKSHEET else spreadsheet.sheet1
+        _sheets.update(pid=os.getpid(), worksheet=worksheet)
+
+        return worksheet
+
+
+def read_sheet_ranges(worksheet, ranges):
+    values = worksheet.batch_get(
+        ranges,
+        major_dimension="COLUMNS",
+        value_render_option="FORMATTED_VALUE"
+    )
+
+    header = [column[0] if column else "" for column in values[0]]
+
+    return header, values[1:]
+
+
+def read_sheet_columns(worksheet, letters, start_row):
+    header, values = read_sheet_ranges(worksheet, ["1:1"] + [f"{letter}{start_row}:{letter}" for letter in letters])
+
+    return header, [column[0] if column else [] for column in values]
+
+
+def read_whole_sheet(worksheet):
+    last = column_letter(max(worksheet.col_count, 1) - 1)
+    header, (values,) = read_sheet_ranges(worksheet, ["1:1", f"A2:{last}"])
+    letters = sheet_column_letters(header)
+    indexes = [column_index(letter) for letter in letters]
+
+    return header, letters, [values[i] if i < len(values) else [] for i in indexes]
+
+
+def sheet_column_letters(header):
+    matches = resolve_analytics_columns(header_signature(header))
+    missing = [c for c in REQUIRED_ANALYTICS_COLS if c not in matches]
+
+    if missing:
+        raise ValueError(
+            "הגיליון לא מכיל את העמודות הדרושות: "
+            + ", ".join(missing)
+            + ". העמודות שנמצאו בגיליון הן: "
+            + ", ".join(str(c) for c in header)
+        )
+
+    return [
+        column_letter(i)
+        for i, name in enumerate(header)
+        if normalize_column_name(name) in ANALYTICS_ALIAS_INDEX
+    ]
+
+
+def sheet_frame(header, letters, columns):
+    rows = max((len(column) for column in columns), default=0)
+    names = [header[column_index(letter)] for letter in letters]
+    data = [column + [""] * (rows - len(column)) for column in columns]
+
+    df = pd.DataFrame(dict(enumerate(data)), columns=range(len(data)))
+    df.columns = names
+
+    return df
+
+
+def load_sheets_watermark():
+    try:
+        with open(SHEETS_WATERMARK_FILE, "r", encoding="utf-8") as f:
+            watermark = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if watermark.get("spreadsheet") != SHEETS_SPREADSHEET_ID or watermark.get("worksheet") != SHEETS_WORKSHEET:
+        return None
+
+    return watermark
+
+
+def sheets_state_key():
+    return [list(key) if key else None for key in analytics_state_key()]
+
+
+def sync_results_sheet(cohort=None):
+    count_metric("analytics_uploads_total", mode="sheet")
+    worksheet = sheets_worksheet()
+    ensure_data_dir()
+
+    with file_lock(SHEETS_LOCK_FILE):
+        watermark = load_sheets_watermark()
+        header = None
+
+        if watermark and watermark["state"] == sheets_state_key():
+            letters = watermark["columns"]
+            header, columns = read_sheet_columns(worksheet, letters, watermark["rows"] + 2)
+
+            if list(header_signature(header)) != watermark["header"]:
+                header = None
+
+        if header is None:
+            header, letters, columns = read_whole_sheet(worksheet)
+            watermark = None
+
+            with file_lock(ANALYTICS_STATE_LOCK_FILE):
+                clear_analytics_state()
+
+        df = sheet_frame(header, letters, columns)
+
+        if watermark and not len(df):
+            return None, 0
+
+        payload = append_results_frame(df, cohort)
+
+        write_json_atomic(SHEETS_WATERMARK_FILE, {
+            "spreadsheet": SHEETS_SPREADSHEET_ID,
+            "worksheet": SHEETS_WORKSHEET,
+            "header": list(header_signature(header)),
+            "columns": letters,
+            "rows": (watermark["rows"] if watermark else 0) + len(df),
+            "state": sheets_state_key(),
+            "synced": time.strftime("%d/%m/%Y %H:%M:%S")
+        })
+
+    return publish_analytics_results(payload), len(df)
+
+
+# ======================================================
+# היסטוריית מחזורים
+# ======================================================
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cohorts (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE,
+    source TEXT,
+    updated TEXT NOT NULL,
+    total_rows INTEGER NOT NULL DEFAULT 0,
+    total_students INTEGER NOT NULL DEFAULT 0,
+    placements_done INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    score_count INTEGER NOT NULL DEFAULT 0,
+    manual_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS placements (
+    cohort_id INTEGER NOT NULL REFERENCES cohorts(id),
+    site TEXT NOT NULL,
+    field TEXT NOT NULL,
+    mentor TEXT,
+    student_id TEXT,
+    score REAL,
+    manual INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS placements_cohort ON placements(cohort_id);
+CREATE INDEX IF NOT EXISTS placements_site ON placements(site, cohort_id, score);
+CREATE INDEX IF NOT EXISTS placements_field ON placements(field, cohort_id, score);
+CREATE INDEX IF NOT EXISTS placements_mentor ON placements(mentor, cohort_id, score);
+
+CREATE TABLE IF NOT EXISTS cohort_sites (
+    site TEXT NOT NULL,
+    cohort_id INTEGER NOT NULL REFERENCES cohorts(id),
+    students INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    score_count INTEGER NOT NULL,
+    PRIMARY KEY (site, cohort_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS cohort_sites_cohort ON cohort_sites(cohort_id);
+
+CREATE TABLE IF NOT EXISTS history_sources (
+    source TEXT PRIMARY KEY,
+    used REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS source_placements (
+    source TEXT NOT NULL,
+    site TEXT NOT NULL,
+    field TEXT NOT NULL,
+    mentor TEXT,
+    student_id TEXT,
+    score REAL,
+    manual INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS source_placements_source ON source_placements(source);
+"""
+
+HISTORY_STAGING_TABLE = """
+CREATE TEMP TABLE IF NOT EXISTS staged_placements (
+    site TEXT NOT NULL,
+    field TEXT NOT NULL,
+    mentor TEXT,
+    student_id TEXT,
+    score REAL,
+    manual INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+HISTORY_TREND_COLUMNS = {"site": "site", "field": "field", "mentor": "mentor"}
+
+_history_ready = set()
+
+
+def history_connection():
+    ensure_data_dir()
+    conn = sqlite3.connect(HISTORY_DB_FILE, timeout=30, isolation_level=None)
+
+    if HISTORY_DB_FILE not in _history_ready:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(HISTORY_SCHEMA)
+        _history_ready.add(HISTORY_DB_FILE)
+
+    return conn
+
+
+def default_cohort_label():
+    now = time.localtime()
+    start_year = now.tm_year if now.tm_mon >= 9 else now.tm_year - 1
+    return f"{start_year}-{start_year + 1}"
+
+
+def history_has_source(label, source):
+    conn = history_connection()
+
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM cohorts WHERE label = ? AND source = ?", (label, source)
+        ).fetchone()
+    finally:
+        conn.close()
+
+    return row is not None
+
+
+def history_has_copy(source):
+    conn = history_connection()
+
+    try:
+        row = conn.execute("SELECT 1 FROM history_sources WHERE source = ?", (source,)).fetchone()
+    finally:
+        conn.close()
+
+    return row is not None
+
+
+def prune_history_sources(conn):
+    stale = conn.execute(
+        "SELECT source FROM history_sources "
+        "WHERE source NOT IN (SELECT source FROM cohorts WHERE source IS NOT NULL) "
+        "ORDER BY used DESC LIMIT -1 OFFSET ?",
+        (HISTORY_SOURCES_KEEP,)
+    ).fetchall()
+
+    conn.executemany("DELETE FROM source_placements WHERE source = ?", stale)
+    conn.executemany("DELETE FROM history_sources WHERE source = ?", stale)
+
+
+def history_rows(df):
+    site = df[SITE_COL].where(df[SITE_COL] != "", UNKNOWN_LABEL)
+    field = df[FIELD_COL].where(df[FIELD_COL] != "", UNKNOWN_LABEL)
+    empty = [None] * len(df)
+
+    mentor = df[MENTOR_COL].tolist() if MENTOR_COL in df.columns else empty
+    student_id = df[STUDENT_ID_COL].tolist() if STUDENT_ID_COL in df.columns else empty
+
+    if SCORE_COL in df.columns:
+        scores = df[SCORE_COL].to_numpy(dtype="float64", na_value=np.nan).tolist()
+        scores = [None if math.isnan(score) else score for score in scores]
+    else:
+        scores = empty
+
+    if MANUAL_COL in df.columns:
+        manual_values = df[MANUAL_COL].astype(str).str.lower().str.strip()
+        manual = manual_values.isin(MANUAL_VALUES).astype(int).tolist()
+    else:
+        manual = [0] * len(df)
+
+    return zip(site.tolist(), field.tolist(), mentor, student_id, scores, manual)
+
+
+class HistoryRecorder:
+    def __init__(self, label, source=None, append=False, replay=False):
+        self.label = label
+        self.source = source
+        self.append = append
+        self.replay = replay
+        self.conn = None
+
+    def staging(self):
+        if self.conn is None:
+            self.conn = history_connection()
+            self.conn.execute("PRAGMA temp_store = FILE")
+            self.conn.execute(HISTORY_STAGING_TABLE)
+
+        return self.conn
+
+    def clear_rows(self):
+        self.staging().execute("DELETE FROM temp.staged_placements")
+
+    def add_frame(self, df):
+        conn = self.staging()
+        conn.execute("BEGIN")
+
+        try:
+            conn.executemany(
+                "INSERT INTO temp.staged_placements (site, field, mentor, student_id, score, manual) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                history_rows(df)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def finish(self, agg):
+        conn = self.staging()
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO cohorts (label, updated) VALUES (?, ?) "
+                "ON CONFLICT(label) DO NOTHING",
+                (self.label, now)
+            )
+            cohort_id = conn.execute(
+                "SELECT id FROM cohorts WHERE label = ?", (self.label,)
+            ).fetchone()[0]
+
+            if not self.append:
+                conn.execute("DELETE FROM placements WHERE cohort_id = ?", (cohort_id,))
+
+            if self.replay:
+                conn.execute(
+                    "INSERT INTO placements (cohort_id, site, field, mentor, student_id, score, manual) "
+                    "SELECT ?, site, field, mentor, student_id, score, manual FROM source_placements "
+                    "WHERE source = ?",
+                    (cohort_id, self.source)
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO placements (cohort_id, site, field, mentor, student_id, score, manual) "
+                    "SELECT ?, site, field, mentor, student_id, score, manual FROM temp.staged_placements",
+                    (cohort_id,)
+                )
+
+            if self.source and not self.replay:
+                conn.execute("DELETE FROM source_placements WHERE source = ?", (self.source,))
+                conn.execute(
+                    "INSERT INTO source_placements (source, site, field, mentor, student_id, score, manual) "
+                    "SELECT ?, site, field, mentor, student_id, score, manual FROM temp.staged_placements",
+                    (self.source,)
+                )
+
+            conn.execute("DELETE FROM cohort_sites WHERE cohort_id = ?", (cohort_id,))
+            conn.executemany(
+                "INSERT INTO cohort_sites (site, cohort_id, students, score_sum, score_count) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        site,
+                        cohort_id,
+                        count,
+                        agg["site_score_sums"].get(site, 0.0),
+                        agg["site_score_counts"].get(site, 0)
+                    )
+                    for site, count in agg["site_counts"].items()
+                ]
+            )
+
+            student_ids = agg["student_ids"]
+            total_students = len(student_ids) if student_ids is not None else 0
+
+            conn.execute(
+                "UPDATE cohorts SET source = ?, updated = ?, total_rows = ?, total_students = ?, "
+                "placements_done = ?, score_sum = ?, score_count = ?, manual_count = ? "
+                "WHERE id = ?",
+                (
+                    self.source,
+                    now,
+                    agg["total_rows"],
+                    total_students or agg["total_rows"],
+                    int(sum(agg["site_counts"].values())),
+                    agg["score_sum"],
+                    agg["score_count"],
+                    agg["manual_count"],
+                    cohort_id
+                )
+            )
+
+            if self.source:
+                conn.execute(
+                    "INSERT INTO history_sources (source, used) VALUES (?, ?) "
+                    "ON CONFLICT(source) DO UPDATE SET used = excluded.used",
+                    (self.source, time.time())
+                )
+                prune_history_sources(conn)
+
+            conn.execute("COMMIT")
+
+        except Exception as e:
+            print("HISTORY ERROR:", e)
+
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+
+            raise
+
+        finally:
+            self.abort()
+
+    def abort(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def history_cohorts():
+    conn = history_connection()
+
+    try:
+        rows = conn.execute(
+            "SELECT label, updated, total_rows, total_students, placements_done, "
+            "score_sum, score_count, manual_count FROM cohorts ORDER BY label"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "cohort": label,
+            "updated": updated,
+            "total_rows": total_rows,
+            "total_students": total_students,
+            "placements_done": placements_done,
+            "success_rate": round(placements_done / total_rows * 100, 1) if total_rows else 0,
+            "avg_score": round(score_sum / score_count, 1) if score_count else None,
+            "manual_count": manual_count
+        }
+        for label, updated, total_rows, total_students, placements_done,
+            score_sum, score_count, manual_count in rows
+    ]
+
+
+def history_trend(by, value):
+    conn = history_connection()
+
+    try:
+        if by == "site":
+            rows = conn.execute(
+                "SELECT c.label, s.students, s.score_sum, s.score_count "
+                "FROM cohort_sites s JOIN cohorts c ON c.id = s.cohort_id "
+                "WHERE s.site = ? ORDER BY c.label",
+                (value,)
+            ).fetchall()
+        else:
+            column = HISTORY_TREND_COLUMNS[by]
+            rows = conn.execute(
+                f"SELECT c.label, COUNT(*), TOTAL(p.score), COUNT(p.score) "
+                f"FROM placements p JOIN cohorts c ON c.id = p.cohort_id "
+                f"WHERE p.{column} = ? GROUP BY p.cohort_id ORDER BY c.label",
+                (value,)
+            ).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "cohort": label,
+            "students": students,
+            "avg_score": round(score_sum / score_count, 1) if score_count else None
+        }
+        for label, students, score_sum, score_count in rows
+    ]
+
+
+# ======================================================
+# תמונת מצב של הניתוח האחרון
+# ======================================================
+
+SNAPSHOT_ID_RE = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{6}$")
+
+_snapshot_cache = OrderedDict()
+_latest_snapshot = {"key": None, "id": None}
+
+
+def analytics_snapshot_path(snapshot_id):
+    return os.path.join(ANALYTICS_SNAPSHOTS_DIR, snapshot_id + ".json")
+
+
+def save_analytics_snapshot(payload):
+    summary, tables, charts = payload
+    os.makedirs(ANALYTICS_SNAPSHOTS_DIR, exist_ok=True)
+
+    snapshot = {
+        "id": time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6],
+        "created": time.strftime("%d/%m/%Y %H:%M"),
+        "summary": summary,
+        "tables": tables,
+        "charts": charts
+    }
+
+    write_json_atomic(
+        analytics_snapshot_path(snapshot["id"]),
+        snapshot,
+        separators=(",", ":"),
+        default=str
+    )
+    write_json_atomic(ANALYTICS_LATEST_SNAPSHOT_FILE, {"id": snapshot["id"]})
+
+    remember_snapshot(snapshot)
+    prune_analytics_snapshots()
+    return snapshot
+
+
+def prune_analytics_snapshots():
+    entries = sorted(
+        (entry.stat().st_mtime_ns, entry.path)
+        for entry in os.scandir(ANALYTICS_SNAPSHOTS_DIR)
+        if entry.name.endswith(".json") and SNAPSHOT_ID_RE.match(entry.name[:-5])
+    )
+
+    for _, path in entries[:-ANALYTICS_SNAPSHOT_KEEP]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def remember_snapshot(snapshot):
+    _snapshot_cache[snapshot["id"]] = snapshot
+    _snapshot_cache.move_to_end(snapshot["id"])
+
+    while len(_snapshot_cache) > ANALYTICS_SNAPSHOT_KEEP:
+        _snapshot_cache.popitem(last=False)
+
+
+def load_analytics_snapshot(snapshot_id):
+    if snapshot_id == "latest":
+        snapshot_id = latest_snapshot_id()
+
+    if not snapshot_id or not SNAPSHOT_ID_RE.match(snapshot_id):
+        return None
+
+    snapshot = _snapshot_cache.get(snapshot_id)
+
+    if snapshot is not None:
+        return snapshot
+
+    try:
+        with open(analytics_snapshot_path(snapshot_id), "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    remember_snapshot(snapshot)
+    return snapshot
+
+
+def latest_snapshot_id():
+    try:
+        key = stats_file_key(os.stat(ANALYTICS_LATEST_SNAPSHOT_FILE))
+    except OSError:
+        return None
+
+    if _latest_snapshot["key"] != key:
+        try:
+            with open(ANALYTICS_LATEST_SNAPSHOT_FILE, "r", encoding="utf-8") as f:
+                _latest_snapshot.update(key=key, id=json.load(f).get("id"))
+        except (OSError, ValueError):
+            return None
+
+    return _latest_snapshot["id"]
+
+
+def clear_latest_analytics_snapshot():
+    try:
+        os.remove(ANALYTICS_LATEST_SNAPSHOT_FILE)
+    except OSError:
+        pass
+
+
+SNAPSHOT_PARTS = ("summary", "tables", "charts")
+
+
+@lru_cache(maxsize=64)
+def encoded_snapshot_part(snapshot_id, part):
+    snapshot = load_analytics_snapshot(snapshot_id)
+
+    if snapshot is None:
+        return None
+
+    data = snapshot if part is None else snapshot[part]
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+    bodies = {"identity": body, "gzip": gzip.compress(body, 6)}
+
+    if brotli is not None:
+        bodies["br"] = brotli.compress(body, quality=9)
+
+    return hashlib.sha256(body).hexdigest(), MappingProxyType(bodies)
+
+
+def snapshot_json_response(snapshot_id, part=None):
+    immutable = snapshot_id != "latest"
+
+    if not immutable:
+        snapshot_id = latest_snapshot_id()
+
+    if not snapshot_id or not SNAPSHOT_ID_RE.match(snapshot_id):
+        return jsonify({"error": "תוצאות הניתוח אינן זמינות."}), 404
+
+    encoded = encoded_snapshot_part(snapshot_id, part)
+
+    if encoded is None:
+        return jsonify({"error": "תוצאות הניתוח אינן זמינות."}), 404
+
+    digest, bodies = encoded
+    encoding = "identity"
+
+    for candidate in ("br", "gzip"):
+        if candidate in bodies and request.accept_encodings[candidate]:
+            encoding = candidate
+            break
+
+    response = app.response_class(bodies[encoding], mimetype="application/json")
+    response.set_etag(digest if encoding == "identity" else digest + "-" + encoding)
+    response.vary.add("Accept-Encoding")
+
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+
+    if immutable:
+        response.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    else:
+        response.headers["Cache-Control"] = "private, no-cache"
+
+    return response.make_conditional(request)
+
+
+AnalyticsTableIndex = namedtuple(
+    "AnalyticsTableIndex",
+    ["columns", "rows", "orders", "ranks", "search_keys", "search_rows"]
+)
+
+
+def table_sort_key(value):
+    text = str(value).strip().rstrip("%")
+
+    try:
+        number = float(text)
+    except ValueError:
+        return (1, 0.0, normalize_hebrew_text(text))
+
+    if math.isnan(number):
+        return (2, 0.0, "")
+
+    return (0, number, "")
+
+
+@lru_cache(maxsize=64)
+def analytics_table_index(snapshot_id, table):
+    snapshot = load_analytics_snapshot(snapshot_id)
+
+    if snapshot is None or table not in snapshot["tables"]:
+        return None
+
+    records = snapshot["tables"][table]
+    columns = tuple(records[0]) if records else ()
+    rows = tuple(tuple(record.get(col) for col in columns) for record in records)
+    positions = range(len(rows))
+
+    orders = []
+    ranks = []
+
+    for col in range(len(columns)):
+        keys = [table_sort_key(row[col]) for row in rows]
+        order = sorted(positions, key=keys.__getitem__)
+        rank = [0] * len(rows)
+
+        for pos, row in enumerate(order):
+            rank[row] = pos
+
+        orders.append(order)
+        ranks.append(rank)
+
+    entries = []
+
+    for row_pos, row in enumerate(rows):
+        name = normalize_hebrew_text(row[0]) if row else ""
+
+        for match in re.finditer(r"\S+", name):
+            entries.append((name[match.start():], row_pos))
+
+    entries.sort()
+
+    return AnalyticsTableIndex(
+        columns=columns,
+        rows=rows,
+        orders=orders,
+        ranks=ranks,
+        search_keys=[key for key, _ in entries],
+        search_rows=[row for _, row in entries]
+    )
+
+
+def query_analytics_table(index, page=1, limit=ANALYTICS_TABLE_PAGE_SIZE, sort=None, descending=False, prefix=""):
+    limit = max(1, min(limit, ANALYTICS_TABLE_MAX_PAGE_SIZE))
+    page = max(1, page)
+    start = (page - 1) * limit
+
+    if sort is not None and not 0 <= sort < len(index.columns):
+        sort = None
+
+    prefix = normalize_hebrew_text(prefix).strip()
+
+    if prefix:
+        lo = bisect.bisect_left(index.search_keys, prefix)
+        hi = bisect.bisect_left(index.search_keys, prefix + "\U0010ffff")
+        matched = set(index.search_rows[lo:hi])
+        rank = index.ranks[sort].__getitem__ if sort is not None else None
+        selected = sorted(matched, key=rank, reverse=descending)
+        total = len(selected)
+        page_rows = selected[start:start + limit]
+    else:
+        total = len(index.rows)
+        order = index.orders[sort] if sort is not None else range(total)
+        stop = min(start + limit, total)
+
+        if descending:
+            page_rows = [order[total - 1 - pos] for pos in range(start, stop)]
+        else:
+            page_rows = order[start:stop]
+
+    return {
+        "columns": index.columns,
+        "rows": [index.rows[row] for row in page_rows],
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "pages": max(1, math.ceil(total / limit))
+    }
+
+
+def publish_analytics_results(payload):
+    summary, tables, charts = payload
+    save_dashboard_stats(build_dashboard_stats(summary))
+    return save_analytics_snapshot(payload)
+
+
+# ======================================================
+# עבודות ניתוח ברקע
+# ======================================================
+
+_analytics_executor = None
+_analytics_futures = {}
+_analytics_jobs_lock = threading.Lock()
+
+
+def is_valid_job_id(job_id):
+    return len(job_id) == 32 and all(c in "0123456789abcdef" for c in job_id)
+
+
+def analytics_job_path(job_id):
+    return os.path.join(ANALYTICS_JOBS_DIR, job_id + ".json")
+
+
+def write_analytics_job(job_id, **fields):
+    path = analytics_job_path(job_id)
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            job = json.load(f)
+    except (OSError, ValueError):
+        job = {"id": job_id, "created": time.time()}
+
+    job.update(fields)
+    job["updated"] = time.time()
+    write_json_atomic(path, job, default=str)
+    return job
+
+
+def load_analytics_job(job_id):
+    if not is_valid_job_id(job_id):
+        return None
+
+    try:
+        with open(analytics_job_path(job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def prune_analytics_jobs():
+    cutoff = time.time() - ANALYTICS_JOB_TTL
+
+    for folder in (ANALYTICS_JOBS_DIR, ANALYTICS_UPLOADS_DIR, CHUNKED_UPLOADS_DIR):
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def get_analytics_executor():
+    global _analytics_executor
+
+    with _analytics_jobs_lock:
+        if _analytics_executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            _analytics_executor = ProcessPoolExecutor(
+                max_workers=ANALYTICS_JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        return _analytics_executor
+
+
+def reset_analytics_executor(executor):
+    global _analytics_executor
+
+    with _analytics_jobs_lock:
+        if _analytics_executor is executor:
+            _analytics_executor = None
+
+
+def analytics_job_done(job_id, upload_path, executor, future):
+    from concurrent.futures.process import BrokenProcessPool
+
+    if future.cancelled():
+        error = RuntimeError("העבודה בוטלה.")
+    else:
+        error = future.exception()
+
+    if error is None:
+        return
+
+    print("ANALYTICS JOB ERROR:", job_id, repr(error))
+    count_metric("analytics_errors_total")
+
+    if isinstance(error, BrokenProcessPool):
+        reset_analytics_executor(executor)
+
+    try:
+        os.remove(upload_path)
+    except OSError:
+        pass
+
+    write_analytics_job(job_id, status="error", stage="שגיאה", error=str(error) or type(error).__name__)
+
+
+def run_analytics_job(job_id, upload_path, filename, cache_key, append=False, cohort=None):
+    write_analytics_job(job_id, status="running", stage="קריאת הקובץ", progress=5)
+
+    def report(fraction):
+        write_analytics_job(job_id, stage="ניתוח הנתונים", progress=int(5 + fraction * 85))
+
+    try:
+        with open(upload_path, "rb") as f:
+            uploaded_file = FileStorage(stream=f, filename=filename)
+
+            if append:
+                payload = append_results_file(uploaded_file, cohort)
+            else:
+                payload = analyze_full_file(uploaded_file, cache_key, cohort, progress=report)
+
+        snapshot = publish_analytics_results(payload)
+
+        write_analytics_job(
+            job_id,
+            status="done",
+            stage="הניתוח הושלם",
+            progress=100,
+            snapshot_id=snapshot["id"]
+        )
+
+    except Exception as e:
+        print("ANALYTICS JOB ERROR:", job_id, e)
+        count_metric("analytics_errors_total")
+        write_analytics_job(job_id, status="error", stage="שגיאה", error=str(e))
+
+    finally:
+        try:
+            os.remove(upload_path)
+        except OSError:
+            pass
+
+
+def pending_analytics_jobs():
+    with _analytics_jobs_lock:
+        for job_id in [j for j, future in _analytics_futures.items() if future.done()]:
+            _analytics_futures.pop(job_id)
+
+        return len(_analytics_futures)
+
+
+class AnalyticsQueueFull(RuntimeError):
+    pass
+
+
+def ensure_upload_dirs():
+    for folder in (ANALYTICS_JOBS_DIR, ANALYTICS_UPLOADS_DIR, CHUNKED_UPLOADS_DIR):
+        os.makedirs(folder, exist_ok=True)
+
+
+def submit_analytics_job(uploaded_file, append=False, cohort=None, upload_path=None):
+    count_metric("analytics_uploads_total", mode="append_job" if append else "job")
+
+    ensure_upload_dirs()
+    prune_analytics_jobs()
+
+    job_id = uuid.uuid4().hex
+    filename = uploaded_file.filename or ""
+    cache_key = analytics_cache_key(uploaded_file)
+
+    if not append:
+        cohort = cohort or default_cohort_label()
+
+    payload = None if append else restore_cached_analysis(cache_key, cohort)
+
+    if payload is not None:
+        snapshot = publish_analytics_results(payload)
+        return write_analytics_job(
+            job_id,
+            status="done",
+            stage="הניתוח הושלם",
+            progress=100,
+            filename=filename,
+            snapshot_id=snapshot["id"]
+        )
+
+    if pending_analytics_jobs() >= ANALYTICS_MAX_PENDING_JOBS:
+        raise AnalyticsQueueFull("יש כרגע יותר מדי קבצים בניתוח. נסי שוב בעוד דקה.")
+
+    extension = os.path.splitext(filename)[1].lower()
+    job_upload_path = os.path.join(ANALYTICS_UPLOADS_DIR, job_id + extension)
+
+    if upload_path:
+        os.replace(upload_path, job_upload_path)
+    else:
+        uploaded_file.save(job_upload_path)
+
+    job = write_analytics_job(
+        job_id,
+        status="queued",
+        stage="ממתין לניתוח",
+        progress=0,
+        filename=filename
+    )
+
+    from concurrent.futures.process import BrokenProcessPool
+
+    job_args = (job_id, job_upload_path, filename, cache_key, append, cohort)
+    executor = get_analytics_executor()
+
+    try:
+        future = executor.submit(run_analytics_job, *job_args)
+    except BrokenProcessPool:
+        reset_analytics_executor(executor)
+        executor = get_analytics_executor()
+        future = executor.submit(run_analytics_job, *job_args)
+
+    with _analytics_jobs_lock:
+        _analytics_futures[job_id] = future
+
+    future.add_done_callback(partial(analytics_job_done, job_id, job_upload_path, executor))
+
+    return job
+
+
+# ======================================================
+# העלאת קבצים במנות
+# ======================================================
+
+def chunked_upload_path(upload_id, suffix):
+    return os.path.join(CHUNKED_UPLOADS_DIR, upload_id + suffix)
+
+
+def load_chunked_upload(upload_id, user):
+    if not UPLOAD_ID_RE.match(upload_id):
+        return None
+
+    try:
+        with open(chunked_upload_path(upload_id, ".json"), "r", encoding="utf-8") as f:
+            upload = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if upload.get("user") != user:
+        return None
+
+    try:
+        upload["offset"] = os.path.getsize(chunked_upload_path(upload_id, ".part"))
+    except OSError:
+        return None
+
+    return upload
+
+
+def discard_chunked_upload(upload_id):
+    for suffix in (".part", ".json", ".lock"):
+        try:
+            os.remove(chunked_upload_path(upload_id, suffix))
+        except OSError:
+            pass
+
+
+def create_chunked_upload(filename, size, user):
+    extension = os.path.splitext(filename)[1].lower()
+
+    if extension not in UPLOAD_EXTENSIONS:
+        raise ValueError("ניתן להעלות רק קבצי CSV, XLSX או XLS.")
+
+    if size <= 0:
+        raise ValueError("הקובץ ריק.")
+
+    if size > ANALYTICS_MAX_UPLOAD_BYTES:
+        raise OverflowError(upload_too_large_message())
+
+    ensure_upload_dirs()
+    prune_analytics_jobs()
+
+    upload = {
+        "id": uuid.uuid4().hex,
+        "filename": filename,
+        "size": size,
+        "user": user,
+        "header_checked": extension != ".csv",
+        "created": time.time()
+    }
+
+    open(chunked_upload_path(upload["id"], ".part"), "wb").close()
+    write_json_atomic(chunked_upload_path(upload["id"], ".json"), upload)
+    upload["offset"] = 0
+
+    return upload
+
+
+def check_csv_header(head, complete=False):
+    cut = head.rfind(b"\n")
+
+    if cut < 0:
+        if complete:
+            cut = len(head)
+        elif len(head) < ENCODING_SNIFF_BYTES:
+            return False
+        else:
+            raise ValueError("שורת הכותרת בקובץ ארוכה מדי או שהקובץ אינו קובץ CSV.")
+
+    for encoding in ("utf-8-sig", "cp1255"):
+        try:
+            text = head[:cut].decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError("לא ניתן לזהות את קידוד הקובץ. שמרי אותו כ-CSV UTF-8 ונסי שוב.")
+
+    header = next(csv.reader(io.StringIO(text)), [])
+    matches = resolve_analytics_columns(header_signature(header))
+    missing = [c for c in REQUIRED_ANALYTICS_COLS if c not in matches]
+
+    if missing:
+        raise ValueError(
+            "הקובץ לא מכיל את העמודות הדרושות: "
+            + ", ".join(missing)
+            + ". העמודות שנמצאו בקובץ הן: "
+            + ", ".join(header)
+        )
+
+    return True
+
+
+def write_upload_chunk(upload, offset, stream):
+    part_path = chunked_upload_path(upload["id"], ".part")
+
+    with file_lock(chunked_upload_path(upload["id"], ".lock")):
+        with open(part_path, "ab") as f:
+            current = f.tell()
+
+            if offset != current:
+                return False
+
+            for block in iter(lambda: stream.read(1024 * 1024), b""):
+                if current + len(block) > upload["size"]:
+                    f.truncate(offset)
+                    raise OverflowError("המנה חורגת מגודל הקובץ שהוצהר.")
+
+                f.write(block)
+                current += len(block)
+
+        if not upload["header_checked"]:
+            with open(part_path, "rb") as f:
+                head = f.read(ENCODING_SNIFF_BYTES)
+
+            if check_csv_header(head, complete=current == upload["size"]):
+                upload["header_checked"] = True
+                write_json_atomic(
+                    chunked_upload_path(upload["id"], ".json"),
+                    {k: v for k, v in upload.items() if k != "offset"}
+                )
+
+    upload["offset"] = current
+    return True
+
+
+def complete_chunked_upload(upload, append=False, cohort=None):
+    part_path = chunked_upload_path(upload["id"], ".part")
+
+    try:
+        with open(part_path, "rb") as f:
+            uploaded_file = FileStorage(stream=f, filename=upload["filename"])
+
+            if app.config["ANALYTICS_ASYNC"]:
+                job = submit_analytics_job(uploaded_file, append, cohort, upload_path=part_path)
+            else:
+                snapshot = analyze_results_file(uploaded_file, append, cohort)
+                job = {"id": None, "status": "done", "snapshot_id": snapshot["id"]}
+    except AnalyticsQueueFull:
+        raise
+    except Exception:
+        discard_chunked_upload(upload["id"])
+        raise
+
+    discard_chunked_upload(upload["id"])
+    return job
+
+
+def upload_too_large_message():
+    return f"הקובץ גדול מדי. הגודל המרבי הוא {ANALYTICS_MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+
+
+def upload_chunk_too_large_message():
+    return f"המנה גדולה מהמותר. גודל המנה המרבי הוא {UPLOAD_CHUNK_BYTES // (1024 * 1024)} MB. נסי להעלות שוב."
+
+
+# ======================================================
+# מייל איפוס סיסמה
+# ======================================================
+
+def build_reset_email(to_email, reset_url):
+    msg = EmailMessage()
+    msg["Subject"] = "איפוס סיסמה למערכת שיבוץ סטודנטים"
+    msg["From"] = FROM_EMAIL
+    msg["To"] = to_email
+    msg.set_content(
+        f"""שלום,
+
+התבקש איפוס סיסמה למערכת.
+
+קישור לאיפוס סיסמה:
+{reset_url}
+
+אם לא את ביקשת – ניתן להתעלם מהודעה זו.
+"""
+    )
+    return msg
+
+
+class MailSender:
+    def __init__(self):
+        self.pid = os.getpid()
+        self.queue = queue.Queue(maxsize=MAIL_QUEUE_SIZE)
+        self.server = None
+        self.thread = threading.Thread(target=self.run, name="mail-sender", daemon=True)
+        self.thread.start()
+
+    def enqueue(self, msg):
+        self.queue.put_nowait(msg)
+
+    def connect(self):
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+
+        if SMTP_STARTTLS:
+            server.starttls()
+
+        if SMTP_USER and SMTP_PASS:
+            server.login(SMTP_USER, SMTP_PASS)
+
+        self.server = server
+
+    def disconnect(self):
+        if self.server is None:
+            return
+
+        try:
+            self.server.quit()
+        except Exception:
+            self.server.close()
+
+        self.server = None
+
+    def deliver(self, msg):
+        for attempt in range(1, MAIL_MAX_ATTEMPTS + 1):
+            try:
+                if self.server is None:
+                    self.connect()
+
+                self.server.send_message(msg)
+                return
+
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused) as e:
+                self.dead_letter(msg, e, attempt)
+                return
+
+            except (smtplib.SMTPException, OSError) as e:
+                print("MAIL ERROR:", msg["To"], attempt, e)
+                self.disconnect()
 
-    charts = {
-        "site_labels": by_site["שם מקום ההתמחות"].tolist(),
-        "site_values": by_site["מספר סטודנטים"].astype(int).tolist(),
+                if attempt == MAIL_MAX_ATTEMPTS:
+                    self.dead_letter(msg, e, attempt)
+                    return
 
-        "field_labels": by_field["תחום התמחות"].tolist(),
-        "field_values": by_field["מספר סטודנטים"].astype(int).tolist(),
+                time.sleep(MAIL_RETRY_DELAY * 2 ** (attempt - 1))
 
-        "mentor_labels": by_mentor["שם המדריך/ה"].tolist()[:10] if not by_mentor.empty else [],
-        "mentor_values": by_mentor["מספר סטודנטים"].astype(int).tolist()[:10] if not by_mentor.empty else [],
+            except Exception as e:
+                print("MAIL ERROR:", msg["To"], attempt, e)
+                self.disconnect()
+                self.dead_letter(msg, e, attempt)
+                return
 
-        "avg_labels": score_avg["שם מקום ההתמחות"].tolist() if not score_avg.empty else [],
-        "avg_values": score_avg["ממוצע התאמה"].astype(float).tolist() if not score_avg.empty else [],
+    def dead_letter(self, msg, error, attempts):
+        print("MAIL DEAD LETTER:", msg["To"], error)
 
-        "score_labels": list(score_dist.index.astype(str)) if len(score_dist) else [],
-        "score_values": [int(v) for v in score_dist.tolist()] if len(score_dist) else [],
+        try:
+            ensure_data_dir()
+            with open(MAIL_DEAD_LETTER_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "to": msg["To"],
+                    "subject": msg["Subject"],
+                    "attempts": attempts,
+                    "error": str(error)
+                }, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print("MAIL ERROR:", e)
 
-        "manual_labels": ["שיבוץ אוטומטי", "עודכן ידנית"],
-        "manual_values": [auto_count, manual_count]
-    }
+    def run(self):
+        while True:
+            try:
+                msg = self.queue.get(timeout=MAIL_IDLE_SECONDS)
+            except queue.Empty:
+                self.disconnect()
+                continue
+
+            if msg is None:
+                self.disconnect()
+                self.queue.task_done()
+                return
+
+            try:
+                self.deliver(msg)
+            except Exception as e:
+                print("MAIL ERROR:", e)
+                self.disconnect()
+            finally:
+                self.queue.task_done()
+
+    def stop(self, timeout=10):
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
 
-    dashboard_stats = {
-        "registered_students": total_students,
-        "registered_mentors": registered_mentors,
-        "registered_sites": registered_sites,
-        "success_rate": f"{success_rate_num}%",
-        "placements_done": placements_done,
-        "avg_score": f"{avg_score_num}%",
-        "last_update": pd.Timestamp.now().strftime("%d/%m/%Y %H:%M")
-    }
+        self.thread.join(timeout)
 
-    save_dashboard_stats(dashboard_stats)
 
-    return summary, tables, charts
+_mail_sender = None
+_mail_sender_lock = threading.Lock()
+
+
+def get_mail_sender():
+    global _mail_sender
+
+    with _mail_sender_lock:
+        if _mail_sender is None or _mail_sender.pid != os.getpid():
+            _mail_sender = MailSender()
+            atexit.register(_mail_sender.stop)
+
+        return _mail_sender
+
+
+def queue_reset_email(to_email, reset_url):
+    if not SMTP_HOST:
+        raise RuntimeError("SMTP settings are missing.")
+
+    try:
+        get_mail_sender().enqueue(build_reset_email(to_email, reset_url))
+    except queue.Full:
+        raise RuntimeError("Mail queue is full.")
 
 
 # ======================================================
-# מייל איפוס סיסמה
+# קבצים סטטיים
 # ======================================================
 
-def send_reset_email(to_email, reset_url):
-    smtp_host = os.getenv("SMTP_HOST")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_pass = os.getenv("SMTP_PASS")
-    from_email = os.getenv("FROM_EMAIL", smtp_user)
+@lru_cache(maxsize=1)
+def asset_manifest():
+    try:
+        with open(ASSET_MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return MappingProxyType(json.load(f))
+    except (OSError, ValueError):
+        return MappingProxyType({})
 
-    if not smtp_host or not smtp_user or not smtp_pass:
-        raise RuntimeError("SMTP settings are missing.")
 
-    msg = EmailMessage()
-    msg["Subject"] = "איפוס סיסמה למערכת שיבוץ סטודנטים"
-    msg["From"] = from_email
-    msg["To"] = to_email
-    msg.set_content(
-        f"""שלום,
+@app.template_global()
+def asset_url(filename):
+    if app.debug:
+        asset_manifest.cache_clear()
 
-התבקש איפוס סיסמה למערכת.
+    hashed = asset_manifest().get(filename)
 
-קישור לאיפוס סיסמה:
-{reset_url}
+    if hashed:
+        return url_for("static", filename=hashed)
 
-אם לא את ביקשת – ניתן להתעלם מהודעה זו.
-"""
-    )
+    if filename in ASSET_FALLBACKS and not os.path.exists(os.path.join(STATIC_DIR, filename)):
+        return ASSET_FALLBACKS[filename]
+
+    return url_for("static", filename=filename)
+
+
+def immutable_asset(path, url):
+    return ASSET_IMMUTABLE_RE.match(url) is not None
 
-    with smtplib.SMTP(smtp_host, smtp_port) as server:
-        server.starttls()
-        server.login(smtp_user, smtp_pass)
-        server.send_message(msg)
+
+def asset_headers(headers, path, url):
+    if immutable_asset(path, url):
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+
+
+app.wsgi_app = WhiteNoise(
+    app.wsgi_app,
+    root=STATIC_DIR,
+    prefix="static/",
+    immutable_file_test=immutable_asset,
+    add_headers_function=asset_headers,
+    autorefresh=os.getenv("FLASK_DEBUG", "0") == "1"
+)
 
 
 # ======================================================
 # מצב תחזוקה
 # ======================================================
 
+MAINTENANCE_PAGE = """
+<html lang="he" dir="rtl">
+<head>
+  <meta charset="utf-8">
+  <title>האתר סגור</title>
+  <style>
+    body{
+      font-family:Heebo,system-ui,-apple-system,Segoe UI,Arial;
+      background:#f8fafc;
+      direction:rtl;
+      text-align:center;
+      margin:0;
+      padding-top:120px;
+      color:#111827;
+    }
+    .box{
+      display:inline-block;
+      padding:32px 40px;
+      border-radius:18px;
+      background:#ffffff;
+      box-shadow:0 10px 30px rgba(15,23,42,.08);
+      border:1px solid #e5e7eb;
+    }
+    h1{margin:0 0 12px;font-size:26px;}
+    p{margin:0;color:#6b7280;}
+  </style>
+</head>
+<body>
+  <div class="box">
+    <h1>⚙️ האתר סגור כרגע</h1>
+    <p>הגישה לאתר מערכת השיבוץ הוגבלה זמנית.</p>
+  </div>
+</body>
+</html>
+""".encode("utf-8")
+
+_maintenance = {"enabled": os.getenv("MAINTENANCE_MODE", "0") == "1", "file": False, "checked": float("-inf")}
+
+
+def maintenance_enabled():
+    now = time.monotonic()
+
+    if now - _maintenance["checked"] >= MAINTENANCE_CHECK_SECONDS:
+        _maintenance["checked"] = now
+        _maintenance["file"] = os.path.exists(MAINTENANCE_FILE)
+
+    return _maintenance["enabled"] or _maintenance["file"]
+
+
 @app.before_request
 def maintenance_mode():
-    allowed_paths = ["/login", "/verify-secret", "/static"]
-
-    if any(request.path.startswith(path) for path in allowed_paths):
+    if request.path.startswith(MAINTENANCE_ALLOWED_PREFIXES) or not maintenance_enabled():
         return None
 
-    if os.getenv("MAINTENANCE_MODE", "0") == "1":
-        html = """
-        <html lang="he" dir="rtl">
-        <head>
-          <meta charset="utf-8">
-          <title>האתר סגור</title>
-          <style>
-            body{
-              font-family:Heebo,system-ui,-apple-system,Segoe UI,Arial;
-              background:#f8fafc;
-              direction:rtl;
-              text-align:center;
-              margin:0;
-              padding-top:120px;
-              color:#111827;
-            }
-            .box{
-              display:inline-block;
-              padding:32px 40px;
-              border-radius:18px;
-              background:#ffffff;
-              box-shadow:0 10px 30px rgba(15,23,42,.08);
-              border:1px solid #e5e7eb;
-            }
-            h1{margin:0 0 12px;font-size:26px;}
-            p{margin:0;color:#6b7280;}
-          </style>
-        </head>
-        <body>
-          <div class="box">
-            <h1>⚙️ האתר סגור כרגע</h1>
-            <p>הגישה לאתר מערכת השיבוץ הוגבלה זמנית.</p>
-          </div>
-        </body>
-        </html>
-        """
-        return Markup(html), 503
-
-    return None
+    return app.response_class(
+        MAINTENANCE_PAGE,
+        status=503,
+        mimetype="text/html",
+        headers={"Retry-After": "300", "Cache-Control": "no-store"}
+    )
 
 
 # ======================================================
 # דפים ציבוריים
 # ======================================================
 
+_public_pages = {}
+
+
+def render_public_page(template):
+    if app.debug or session.get("_flashes"):
+        return render_template(template)
+
+    page = _public_pages.get(template)
+
+    if page is None:
+        body = render_template(template).encode("utf-8")
+        page = (body, hashlib.sha256(body).hexdigest()[:32], int(time.time()))
+        _public_pages[template] = page
+
+    response = app.response_class(page[0], mimetype="text/html")
+    response.set_etag(page[1])
+    response.last_modified = page[2]
+    response.cache_control.no_cache = True
+
+    return response.make_conditional(request)
+
+
+def external_redirect(url):
+    response = redirect(url)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+
+    return response
+
+
 @app.route("/")
 def index():
-    return render_template("matching.html")
+    return render_public_page("matching.html")
 
 
 @app.route("/contact", methods=["GET", "POST"])
@@ -537,14 +3227,14 @@ def contact():
         flash("הפנייה נשלחה בהצלחה! נחזור אליך בהקדם.", "success")
         return redirect(url_for("contact"))
 
-    return render_template("contact.html")
+    return render_public_page("contact.html")
 
 
 # ======================================================
 # צ'אט
 # ======================================================
 
-CHAT_KNOWLEDGE = [
+DEFAULT_CHAT_KNOWLEDGE = [
     {
         "keywords": ["שיבוץ", "תהליך", "איך עובד", "איך זה עובד", "התאמה"],
         "answer": """תהליך השיבוץ עובד בשלושה שלבים:
@@ -572,6 +3262,157 @@ CHAT_KNOWLEDGE = [
 ]
 
 
+HEBREW_NIQQUD_RE = re.compile("[\u0591-\u05c7]")
+CHAT_TOKEN_RE = re.compile(r"\w+")
+HEBREW_FINAL_LETTERS = str.maketrans("ךםןףץ", "כמנפצ")
+HEBREW_PREFIX_LETTERS = "ובכלמשה"
+HEBREW_PLURAL_SUFFIXES = ("ימ", "ות")
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def normalize_hebrew_text(text):
+    text = HEBREW_NIQQUD_RE.sub("", str(text).lower())
+
+    for mark in ('"', "'", "״", "׳"):
+        text = text.replace(mark, "")
+
+    return text.translate(HEBREW_FINAL_LETTERS)
+
+
+def hebrew_stem(token):
+    if len(token) >= 5 and token.endswith(HEBREW_PLURAL_SUFFIXES):
+        return token[:-2]
+
+    if len(token) >= 4 and token.endswith("ה"):
+        return token[:-1]
+
+    return token
+
+
+def hebrew_prefix_variants(token):
+    yield token
+
+    for cut in (1, 2):
+        if len(token) - cut < 2 or token[cut - 1] not in HEBREW_PREFIX_LETTERS:
+            return
+
+        yield token[cut:]
+
+
+def tokenize_keywords(text):
+    return [hebrew_stem(token) for token in CHAT_TOKEN_RE.findall(normalize_hebrew_text(text))]
+
+
+class ChatIndex:
+    def __init__(self, items):
+        self.items = items
+        self.postings = {}
+        self.vocabulary = set()
+        self.phrase_length = 1
+
+        documents = []
+
+        for item in items:
+            terms = Counter()
+
+            for keyword in item.get("keywords", []):
+                tokens = tokenize_keywords(keyword)
+
+                if tokens:
+                    terms[" ".join(tokens)] += 1
+                    self.vocabulary.update(tokens)
+                    self.phrase_length = max(self.phrase_length, len(tokens))
+
+            documents.append(terms)
+
+        total_docs = len(documents)
+        avg_length = sum(sum(terms.values()) for terms in documents) / total_docs if total_docs else 0
+
+        doc_freq = Counter()
+        for terms in documents:
+            doc_freq.update(terms.keys())
+
+        for index, terms in enumerate(documents):
+            length_norm = 1 - BM25_B + BM25_B * (sum(terms.values()) / avg_length if avg_length else 0)
+
+            for term, freq in terms.items():
+                idf = math.log(1 + (total_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                weight = idf * freq * (BM25_K1 + 1) / (freq + BM25_K1 * length_norm)
+                self.postings.setdefault(term, []).append((index, weight))
+
+    def query_terms(self, message):
+        tokens = []
+
+        for token in CHAT_TOKEN_RE.findall(normalize_hebrew_text(message)):
+            stems = [hebrew_stem(variant) for variant in hebrew_prefix_variants(token)]
+            tokens.append(next((stem for stem in stems if stem in self.vocabulary), stems[0]))
+
+        terms = set()
+
+        for size in range(1, min(self.phrase_length, len(tokens)) + 1):
+            for start in range(len(tokens) - size + 1):
+                phrase = " ".join(tokens[start:start + size])
+
+                if phrase in self.postings:
+                    terms.add(phrase)
+
+        return terms
+
+    def best_match(self, message):
+        scores = {}
+
+        for term in self.query_terms(message):
+            for index, weight in self.postings[term]:
+                scores[index] = scores.get(index, 0.0) + weight
+
+        if not scores:
+            return None
+
+        best_index = min(scores, key=lambda index: (-scores[index], index))
+        return self.items[best_index]
+
+
+_chat_index = {"key": None, "index": None}
+
+
+def load_chat_knowledge(path):
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+
+    if not isinstance(items, list) or not all(
+        isinstance(item, dict) and "answer" in item and isinstance(item.get("keywords"), list)
+        for item in items
+    ):
+        raise ValueError("chat knowledge must be a list of {keywords, answer} entries")
+
+    return items
+
+
+def get_chat_index():
+    try:
+        st = os.stat(CHAT_KNOWLEDGE_FILE)
+        key = (st.st_mtime_ns, st.st_ino, st.st_size)
+    except OSError:
+        key = "default"
+
+    if _chat_index["key"] == key:
+        return _chat_index["index"]
+
+    if key == "default":
+        index = ChatIndex(DEFAULT_CHAT_KNOWLEDGE)
+    else:
+        try:
+            index = ChatIndex(load_chat_knowledge(CHAT_KNOWLEDGE_FILE))
+        except (OSError, ValueError) as e:
+            print("CHAT KNOWLEDGE ERROR:", e)
+            index = _chat_index["index"] or ChatIndex(DEFAULT_CHAT_KNOWLEDGE)
+
+    _chat_index.update(key=key, index=index)
+    return index
+
+
 def build_dynamic_stats_answer():
     stats = load_dashboard_stats()
 
@@ -593,19 +3434,7 @@ def api_chat():
     if not message:
         return jsonify({"answer": "כתבי שאלה קצרה על השיבוץ, השאלונים או דף הניתוחים."})
 
-    best_item = None
-    best_score = 0
-
-    for item in CHAT_KNOWLEDGE:
-        score = 0
-
-        for keyword in item["keywords"]:
-            if keyword.lower() in message:
-                score += 1
-
-        if score > best_score:
-            best_score = score
-            best_item = item
+    best_item = get_chat_index().best_match(message)
 
     if best_item:
         if best_item["answer"] == "DYNAMIC_STATS":
@@ -678,7 +3507,7 @@ def forgot_password():
         reset_url = url_for("reset_password", token=token, _external=True)
 
         try:
-            send_reset_email(email, reset_url)
+            queue_reset_email(email, reset_url)
             flash("נשלח קישור לאיפוס סיסמה לכתובת הדוא\"ל המוסדית.", "success")
         except Exception as e:
             print("MAIL ERROR:", e)
@@ -770,11 +3599,14 @@ def reset_dashboard_data():
         return auth_redirect
 
     save_dashboard_stats(default_dashboard_stats())
+    clear_latest_analytics_snapshot()
+    clear_analytics_state()
     flash("נתוני הפאנל אופסו בהצלחה.", "success")
     return redirect(url_for("dashboard"))
 
 
 @app.route("/analytics", methods=["GET", "POST"])
+@profiled
 def analytics():
     auth_redirect = check_auth()
 
@@ -788,25 +3620,359 @@ def analytics():
             return render_template("analytics.html", error="לא נבחר קובץ.")
 
         try:
-            df = read_uploaded_dataframe(results_file)
-            summary, tables, charts = build_analytics_payload(df)
+            snapshot = analyze_results_file(
+                results_file,
+                append=request.form.get("mode") == "append",
+                cohort=request.form.get("cohort", "").strip() or None
+            )
 
             return render_template(
                 "analytics.html",
-                summary=summary,
-                tables=tables,
-                charts=charts,
+                summary=snapshot["summary"],
+                snapshot_id=snapshot["id"],
                 success="הקובץ נותח בהצלחה והנתונים עודכנו בפאנל המרצים."
             )
 
         except Exception as e:
             print("ANALYTICS ERROR:", e)
+            count_metric("analytics_errors_total")
             return render_template(
                 "analytics.html",
                 error=f"שגיאה בניתוח הקובץ: {e}"
+            ), 400 if isinstance(e, ValueError) else 500
+
+    job_id = request.args.get("job")
+    snapshot_id = request.args.get("snapshot")
+    success = None
+
+    if job_id:
+        job = load_analytics_job(job_id)
+
+        if not job or job.get("status") != "done":
+            return render_template("analytics.html", error="תוצאות הניתוח אינן זמינות.")
+
+        snapshot_id = job.get("snapshot_id")
+        success = "הקובץ נותח בהצלחה והנתונים עודכנו בפאנל המרצים."
+
+    if snapshot_id:
+        snapshot = load_analytics_snapshot(snapshot_id)
+
+        if snapshot is None:
+            return render_template("analytics.html", error="תוצאות הניתוח אינן זמינות.")
+    else:
+        snapshot = load_analytics_snapshot("latest")
+
+        if snapshot is None:
+            return render_template("analytics.html")
+
+    return render_template(
+        "analytics.html",
+        summary=snapshot["summary"],
+        snapshot_id=snapshot["id"],
+        snapshot_created=snapshot.get("created"),
+        success=success
+    )
+
+
+@app.route("/analytics/sheet-sync", methods=["POST"])
+def analytics_sheet_sync():
+    auth_redirect = check_auth()
+
+    if auth_redirect:
+        return auth_redirect
+
+    try:
+        snapshot, added_rows = sync_results_sheet(request.form.get("cohort", "").strip() or None)
+    except Exception as e:
+        print("SHEETS SYNC ERROR:", e)
+        count_metric("analytics_errors_total")
+        return render_template("analytics.html", error=f"שגיאה בסנכרון הגיליון: {e}")
+
+    if snapshot is None:
+        flash("אין שורות חדשות בגיליון מאז הסנכרון האחרון.", "success")
+        return redirect(url_for("analytics"))
+
+    return render_template(
+        "analytics.html",
+        summary=snapshot["summary"],
+        snapshot_id=snapshot["id"],
+        success=f"נקלטו {added_rows} שורות מהגיליון והנתונים עודכנו בפאנל המרצים."
+    )
+
+
+@app.route("/api/analytics/jobs", methods=["POST"])
+def api_analytics_create_job():
+    if "lecturer_email" not in session:
+        return jsonify({"error": "נא להתחבר למערכת המרצים תחילה."}), 401
+
+    results_file = request.files.get("results_file")
+
+    if not results_file or results_file.filename == "":
+        return jsonify({"error": "לא נבחר קובץ."}), 400
+
+    try:
+        job = submit_analytics_job(
+            results_file,
+            append=request.form.get("mode") == "append",
+            cohort=request.form.get("cohort", "").strip() or None
+        )
+    except AnalyticsQueueFull as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": "60"}
+    except Exception as e:
+        print("ANALYTICS ERROR:", e)
+        count_metric("analytics_errors_total")
+        return jsonify({"error": f"שגיאה בניתוח הקובץ: {e}"}), 400 if isinstance(e, ValueError) else 500
+
+    return jsonify({
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": url_for("api_analytics_job", job_id=job["id"]),
+        "result_url": url_for("analytics", job=job["id"])
+    }), 202
+
+
+@app.route("/api/analytics/<snapshot_id>")
+@app.route("/api/analytics/<snapshot_id>/<part>")
+def api_analytics_snapshot(snapshot_id, part=None):
+    if "lecturer_email" not in session:
+        return jsonify({"error": "נא להתחבר למערכת המרצים תחילה."}), 401
+
+    if part is not None and part not in SNAPSHOT_PARTS:
+        return jsonify({"error": "החלק המבוקש אינו קיים."}), 404
+
+    return snapshot_json_response(snapshot_id, part)
+
+
+@app.route("/api/analytics/<snapshot_id>/tables/<table>")
+def api_analytics_table(snapshot_id, table):
+    if "lecturer_email" not in session:
+        return jsonify({"error": "נא להתחבר למערכת המרצים תחילה."}), 401
+
+    immutable = snapshot_id != "latest"
+
+    if not immutable:
+        snapshot_id = latest_snapshot_id()
+
+    if not snapshot_id or not SNAPSHOT_ID_RE.match(snapshot_id):
+        return jsonify({"error": "תוצאות הניתוח אינן זמינות."}), 404
+
+    index = analytics_table_index(snapshot_id, table)
+
+    if index is None:
+        return jsonify({"error": "הטבלה המבוקשת אינה קיימת."}), 404
+
+    result = query_analytics_table(
+        index,
+        page=request.args.get("page", 1, type=int),
+        limit=request.args.get("limit", ANALYTICS_TABLE_PAGE_SIZE, type=int),
+        sort=request.args.get("sort", type=int),
+        descending=request.args.get("order") == "desc",
+        prefix=request.args.get("q", "")
+    )
+
+    response = jsonify(result)
+
+    if immutable:
+        response.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    else:
+        response.headers["Cache-Control"] = "private, no-cache"
+
+    return response
+
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    if request.endpoint == "api_upload":
+        return jsonify({"error": upload_chunk_too_large_message()}), 413
+
+    if request.path.startswith("/api/"):
+        return jsonify({"error": upload_too_large_message()}), 413
+
+    return render_template("analytics.html", error=upload_too_large_message()), 413
+
+
+def upload_json(upload):
+    return {
+        "upload_id": upload["id"],
+        "offset": upload["offset"],
+        "size": upload["size"],
+        "chunk_size": UPLOAD_CHUNK_BYTES,
+        "upload_url": url_for("api_upload", upload_id=upload["id"]),
+        "complete_url": url_for("api_complete_upload", upload_id=upload["id"])
+    }
+
+
+@app.route("/api/uploads", methods=["POST"])
+def api_create_upload():
+    if "lecturer_email" not in session:
+        return jsonify({"error": "נא להתחבר למערכת המרצים תחילה."}), 401
+
+    data = request.get_json(silent=True) or {}
+
+    try:
+        upload = create_chunked_upload(
+            str(data.get("filename", "")).strip(),
+            int(data.get("size", 0)),
+            session["lecturer_email"]
+        )
+    except OverflowError as e:
+        return jsonify({"error": str(e)}), 413
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(upload_json(upload)), 201
+
+
+@app.route("/api/uploads/<upload_id>", methods=["GET", "PATCH", "DELETE"])
+def api_upload(upload_id):
+    if "lecturer_email" not in session:
+        return jsonify({"error": "נא להתחבר למערכת המרצים תחילה."}), 401
+
+    upload = load_chunked_upload(upload_id, session["lecturer_email"])
+
+    if upload is None:
+        return jsonify({"error": "ההעלאה לא נמצאה."}), 404
+
+    if request.method == "DELETE":
+        discard_chunked_upload(upload_id)
+        return "", 204
+
+    if request.method == "GET":
+        return jsonify(upload_json(upload))
+
+    request.max_content_length = UPLOAD_CHUNK_BYTES
+
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+    except ValueError:
+        return jsonify({"error": "חסרה הכותרת Upload-Offset."}), 400
+
+    try:
+        accepted = write_upload_chunk(upload, offset, request.stream)
+    except OverflowError as e:
+        return jsonify({"error": str(e), "offset": offset}), 400
+    except ValueError as e:
+        discard_chunked_upload(upload_id)
+        count_metric("analytics_errors_total")
+        return jsonify({"error": str(e)}), 422
+
+    if not accepted:
+        upload = load_chunked_upload(upload_id, session["lecturer_email"]) or upload
+        return jsonify({"error": "המיקום בקובץ אינו תואם.", "offset": upload["offset"]}), 409
+
+    return jsonify(upload_json(upload))
+
+
+@app.route("/api/uploads/<upload_id>/complete", methods=["POST"])
+def api_complete_upload(upload_id):
+    if "lecturer_email" not in session:
+        return jsonify({"error": "נא להתחבר למערכת המרצים תחילה."}), 401
+
+    upload = load_chunked_upload(upload_id, session["lecturer_email"])
+
+    if upload is None:
+        return jsonify({"error": "ההעלאה לא נמצאה."}), 404
+
+    if upload["offset"] != upload["size"]:
+        return jsonify({"error": "הקובץ לא הועלה במלואו.", "offset": upload["offset"]}), 409
+
+    try:
+        job = complete_chunked_upload(
+            upload,
+            append=request.form.get("mode") == "append",
+            cohort=request.form.get("cohort", "").strip() or None
+        )
+    except AnalyticsQueueFull as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": "60"}
+    except Exception as e:
+        print("ANALYTICS ERROR:", e)
+        count_metric("analytics_errors_total")
+        return jsonify({"error": f"שגיאה בניתוח הקובץ: {e}"}), 400 if isinstance(e, ValueError) else 500
+
+    if job["status"] == "done" and job.get("snapshot_id"):
+        result_url = url_for("analytics", snapshot=job["snapshot_id"])
+    else:
+        result_url = url_for("analytics", job=job["id"])
+
+    return jsonify({
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": url_for("api_analytics_job", job_id=job["id"]) if job["id"] else None,
+        "result_url": result_url
+    }), 202 if job["id"] else 200
+
+
+@app.route("/api/analytics/jobs/<job_id>")
+def api_analytics_job(job_id):
+    if "lecturer_email" not in session:
+        return jsonify({"error": "נא להתחבר למערכת המרצים תחילה."}), 401
+
+    job = load_analytics_job(job_id)
+
+    if job is None:
+        return jsonify({"error": "העבודה לא נמצאה."}), 404
+
+    if job.get("snapshot_id"):
+        job["result_url"] = url_for("analytics", snapshot=job["snapshot_id"])
+        snapshot = load_analytics_snapshot(job["snapshot_id"])
+
+        if snapshot is not None:
+            job.update(
+                summary=snapshot["summary"],
+                tables=snapshot["tables"],
+                charts=snapshot["charts"]
             )
+    else:
+        job["result_url"] = url_for("analytics", job=job_id)
+
+    return jsonify(job)
+
+
+@app.route("/api/history/cohorts")
+def api_history_cohorts():
+    if "lecturer_email" not in session:
+        return jsonify({"error": "נא להתחבר למערכת המרצים תחילה."}), 401
+
+    return jsonify(history_cohorts())
+
+
+@app.route("/api/history/trend")
+def api_history_trend():
+    if "lecturer_email" not in session:
+        return jsonify({"error": "נא להתחבר למערכת המרצים תחילה."}), 401
+
+    by = request.args.get("by", "site")
+    value = request.args.get("value", "").strip()
+
+    if by not in HISTORY_TREND_COLUMNS or not value:
+        return jsonify({"error": "יש לבחור מקום, תחום או מדריך/ה להשוואה."}), 400
+
+    return jsonify({"by": by, "value": value, "trend": history_trend(by, value)})
+
+
+@app.route("/profiles")
+def profiles():
+    auth_redirect = check_auth()
+
+    if auth_redirect:
+        return auth_redirect
+
+    return render_template("profiles.html", profiles=load_profiles())
+
+
+@app.route("/profiles/<profile_id>.prof")
+def download_profile(profile_id):
+    auth_redirect = check_auth()
+
+    if auth_redirect:
+        return auth_redirect
+
+    path = os.path.join(PROFILES_DIR, profile_id + ".prof")
+
+    if not PROFILE_ID_RE.match(profile_id) or not os.path.exists(path):
+        return "הפרופיל לא נמצא.", 404
 
-    return render_template("analytics.html")
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=profile_id + ".prof")
 
 
 @app.route("/placement-system")
@@ -821,12 +3987,12 @@ def placement_system():
 
 @app.route("/students-form")
 def students_form():
-    return redirect("https://www.studentssurvey.org")
+    return external_redirect("https://www.studentssurvey.org")
 
 
 @app.route("/mentors-form")
 def mentors_form():
-    return redirect("https://mentormappingsurvey.org")
+    return external_redirect("https://mentormappingsurvey.org")
 
 
 if __name__ == "__main__":
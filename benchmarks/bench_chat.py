@@ -0,0 +1,99 @@
+"""Micro-benchmark of /api/chat keyword matching at growing FAQ sizes.
+
+    python benchmarks/bench_chat.py --sizes 10 100 1000
+
+Compares the original nested substring scan with the BM25 ChatIndex on the
+same synthetic knowledge base and prints JSON.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+WORDS = [
+    "שיבוץ", "סטודנט", "מדריך", "התמחות", "שאלון", "ניתוח", "גרף", "ציון",
+    "התאמה", "מוסד", "עיר", "קיבולת", "תחום", "רווחה", "בריאות", "חינוך",
+    "קהילה", "טופס", "סיסמה", "מרצה", "דוח", "נתונים", "קובץ", "העלאה",
+]
+
+MESSAGES = [
+    "איך עובד השיבוץ של הסטודנטים למקומות ההתמחות?",
+    "כמה מדריכים יש בקובץ האחרון ומה ממוצע ההתאמה",
+    "שכחתי סיסמה למערכת המרצים",
+    "מה זה?",
+]
+
+
+def build_knowledge(size, seed=0):
+    rnd = random.Random(seed)
+    items = []
+
+    for i in range(size):
+        keywords = [
+            " ".join(rnd.sample(WORDS, rnd.randint(1, 2))) + f" {i}" if rnd.random() < 0.5
+            else rnd.choice(WORDS) + str(i)
+            for _ in range(rnd.randint(3, 8))
+        ]
+        items.append({"keywords": keywords, "answer": f"תשובה {i}"})
+
+    return items
+
+
+def nested_scan(items, message):
+    best_item = None
+    best_score = 0
+
+    for item in items:
+        score = 0
+
+        for keyword in item["keywords"]:
+            if keyword.lower() in message:
+                score += 1
+
+        if score > best_score:
+            best_score = score
+            best_item = item
+
+    return best_item
+
+
+def measure(func, number, calls=1):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    return round(seconds / (number * calls) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    report = {"unit": "microseconds per question", "sizes": {}}
+
+    for size in args.sizes:
+        items = build_knowledge(size)
+        index = app.ChatIndex(items)
+        messages = [m.lower() for m in MESSAGES]
+
+        report["sizes"][size] = {
+            "nested_scan": measure(
+                lambda: [nested_scan(items, m) for m in messages], args.number, len(messages)
+            ),
+            "chat_index": measure(
+                lambda: [index.best_match(m) for m in messages], args.number, len(messages)
+            ),
+            "build_ms": round(measure(lambda: app.ChatIndex(items), 3) / 1000, 2),
+        }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Parse time and peak RSS of the analytics Excel reader on wide workbooks.
+
+    python benchmarks/bench_excel.py --rows 20000 --extra-cols 80
+
+Each variant runs in a fresh interpreter so ru_maxrss is not shared between
+them. Results are printed as JSON.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import write_results_file  # noqa: E402
+
+VARIANT_CODE = {
+    "pandas_default": (
+        "import pandas as pd\n",
+        "pd.read_excel(PATH)\n"
+    ),
+    "analytics_reader": (
+        "import app\n"
+        "from werkzeug.datastructures import FileStorage\n"
+        "app.load_analytics_modules()\n",
+        "with open(PATH, 'rb') as f:\n"
+        "    app.read_uploaded_excel(FileStorage(f, filename='results.xlsx'))\n"
+    ),
+}
+
+RUNNER = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+PATH = {path!r}
+{setup}
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": round(elapsed, 4),
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+}}))
+"""
+
+
+def run_variant(name, path):
+    setup, code = VARIANT_CODE[name]
+    script = RUNNER.format(root=ROOT, path=path, setup=setup, code=code)
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--extra-cols", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.xlsx")
+        write_results_file(path, args.rows, fmt="xlsx", extra_cols=args.extra_cols)
+
+        report = {
+            "rows": args.rows,
+            "extra_cols": args.extra_cols,
+            "file_mb": round(os.path.getsize(path) / (1024 * 1024), 2),
+            "variants": {}
+        }
+
+        for name in VARIANT_CODE:
+            runs = [run_variant(name, path) for _ in range(args.repeat)]
+            report["variants"][name] = {
+                "seconds": min(r["seconds"] for r in runs),
+                "max_rss_mb": max(r["max_rss_mb"] for r in runs)
+            }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
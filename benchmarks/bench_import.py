@@ -0,0 +1,111 @@
+"""Cold import time of app.py, measured with `python -X importtime`.
+
+    python benchmarks/bench_import.py --runs 5 --max-ms 400
+
+Every run is a fresh interpreter. The report lists the median cumulative
+import time of app and its heaviest direct imports. The exit status is 1
+when the median is above --max-ms, or when a module in --forbid (pandas,
+numpy and openpyxl by default) gets loaded by the import, so the script can
+be used as a regression gate.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORBID = ["pandas", "numpy", "openpyxl"]
+
+
+def import_once(forbid):
+    probe = (
+        "import json, sys, app; "
+        f"print(json.dumps([name for name in {forbid!r} if name in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "LAZY_IMPORTS": "1"}
+    )
+    children = {}
+    pending = {}
+    total = None
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+
+        if not cumulative.strip().isdigit():
+            continue
+
+        if not name.startswith("  "):
+            if name.strip() == "app":
+                total = int(cumulative) / 1000
+                children = pending
+
+            pending = {}
+        elif not name.startswith("    "):
+            pending[name.strip()] = int(cumulative) / 1000
+
+    return total, children, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float)
+    parser.add_argument("--forbid", nargs="*", default=FORBID)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    totals = []
+    children = {}
+    loaded = set()
+
+    for _ in range(args.runs):
+        total, run_children, run_loaded = import_once(args.forbid)
+        totals.append(total)
+        loaded.update(run_loaded)
+
+        for name, ms in run_children.items():
+            children.setdefault(name, []).append(ms)
+
+    median = statistics.median(totals)
+    heaviest = sorted(
+        ((name, statistics.median(values)) for name, values in children.items()),
+        key=lambda item: item[1],
+        reverse=True
+    )[:args.top]
+
+    print(json.dumps({
+        "runs": args.runs,
+        "median_ms": round(median, 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "heaviest_imports_ms": {name: round(ms, 1) for name, ms in heaviest},
+        "forbidden_loaded": sorted(loaded),
+    }, indent=2))
+
+    failed = False
+
+    if loaded:
+        print(f"FAIL: import app loaded {', '.join(sorted(loaded))}", file=sys.stderr)
+        failed = True
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"FAIL: median import {median:.1f} ms > {args.max_ms:.1f} ms", file=sys.stderr)
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
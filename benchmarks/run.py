@@ -0,0 +1,247 @@
+"""Benchmark suite for the analytics pipeline and the chat endpoint.
+
+    python -m benchmarks.run --rows 1000 100000 --format csv xlsx --out before.json
+    python -m benchmarks.run --rows 1000 100000 --format csv xlsx --compare before.json
+
+Cases:
+- parse: read_uploaded_dataframe
+- normalize: normalize_analytics_columns
+- aggregate: aggregate + format on a normalized frame
+- e2e: a POST to /analytics through the test client, with the payload cache disabled
+- chat: a POST to /api/chat
+
+Every round is timed on its own, and the report uses the field names of
+pytest-benchmark's JSON (min, max, mean, median, stddev, rounds), so
+reports from two commits can be diffed directly or through --compare.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_chat import MESSAGES, build_knowledge  # noqa: E402
+from benchmarks.synthetic import results_bytes  # noqa: E402
+
+CASES = ["parse", "normalize", "aggregate", "e2e", "chat"]
+
+
+def run_case(func, setup=None, rounds=5, warmup=1):
+    timings = []
+
+    for i in range(warmup + rounds):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+
+        if i >= warmup:
+            timings.append(elapsed)
+
+    return {
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.fmean(timings),
+        "median": statistics.median(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": len(timings),
+    }
+
+
+def rounds_for(rows, base):
+    if rows >= 500000:
+        return 1
+    if rows >= 100000:
+        return max(1, base // 2)
+    return base
+
+
+def file_cases(app, cases, rows, fmt, encoding, score, manual, base_rounds):
+    from werkzeug.datastructures import FileStorage
+
+    filename = "results." + fmt
+    data = results_bytes(rows, fmt=fmt, encoding=encoding, score=score, manual=manual)
+    uploaded = lambda: (FileStorage(io.BytesIO(data), filename=filename),)
+    raw = app.read_uploaded_dataframe(uploaded()[0])
+    prepared = app.prepare_analytics_frame(raw.copy())
+    rounds = rounds_for(rows, base_rounds)
+
+    if "parse" in cases:
+        yield "parse", run_case(app.read_uploaded_dataframe, uploaded, rounds)
+
+    if "normalize" in cases:
+        yield "normalize", run_case(app.normalize_analytics_columns, lambda: (raw.copy(),), rounds)
+
+    if "aggregate" in cases:
+        yield "aggregate", run_case(
+            lambda df: app.format_analytics_payload(app.aggregate_analytics_frame(df)),
+            lambda: (prepared,),
+            rounds
+        )
+
+    if "e2e" not in cases:
+        return
+
+    client = app.app.test_client()
+
+    with client.session_transaction() as session:
+        session["lecturer_email"] = "bench@example.com"
+
+    def post_analytics():
+        app._analytics_cache.clear()
+        response = client.post(
+            "/analytics",
+            data={"results_file": (io.BytesIO(data), filename)},
+            content_type="multipart/form-data"
+        )
+        assert response.status_code == 200
+
+    yield "e2e", run_case(post_analytics, rounds=rounds)
+
+
+def chat_case(app, size, base_rounds):
+    app.ensure_data_dir()
+
+    with open(app.CHAT_KNOWLEDGE_FILE, "w", encoding="utf-8") as f:
+        json.dump(build_knowledge(size), f, ensure_ascii=False)
+
+    client = app.app.test_client()
+
+    def ask():
+        for message in MESSAGES:
+            client.post("/api/chat", json={"message": message})
+
+    return run_case(ask, rounds=base_rounds * 20)
+
+
+def machine_info():
+    import numpy
+    import pandas
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "commit": commit,
+    }
+
+
+def compare(report, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {b["name"]: b for b in json.load(f)["benchmarks"]}
+
+    print(f"{'benchmark':<48} {'before ms':>10} {'after ms':>10} {'ratio':>7}", file=sys.stderr)
+
+    for bench in report["benchmarks"]:
+        before = baseline.get(bench["name"])
+
+        if before is None:
+            continue
+
+        old = before["stats"]["median"] * 1000
+        new = bench["stats"]["median"] * 1000
+        print(f"{bench['name']:<48} {old:>10.2f} {new:>10.2f} {new / old:>7.2f}", file=sys.stderr)
+
+
+def collect(app, args):
+    benchmarks = []
+    score = not args.no_score
+    manual = not args.no_manual
+    file_groups = [case for case in args.cases if case != "chat"]
+
+    for fmt in args.format if file_groups else []:
+        for encoding in args.encoding if fmt == "csv" else [None]:
+            for rows in args.rows:
+                params = {
+                    "rows": rows,
+                    "format": fmt,
+                    "encoding": encoding,
+                    "score": score,
+                    "manual": manual,
+                }
+
+                for group, stats in file_cases(
+                    app, file_groups, rows, fmt, encoding, score, manual, args.rounds
+                ):
+                    name = f"{group}[{'-'.join(str(p) for p in (fmt, encoding, rows) if p)}]"
+                    benchmarks.append({"name": name, "group": group, "params": params, "stats": stats})
+                    print(f"{name}: {stats['median'] * 1000:.2f} ms", file=sys.stderr)
+
+    if "chat" in args.cases:
+        for size in args.chat_sizes:
+            stats = chat_case(app, size, args.rounds)
+            name = f"chat[{size}]"
+            benchmarks.append({
+                "name": name,
+                "group": "chat",
+                "params": {"knowledge_items": size, "messages": len(MESSAGES)},
+                "stats": stats,
+            })
+            print(f"{name}: {stats['median'] * 1000:.2f} ms", file=sys.stderr)
+
+    return benchmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--format", nargs="+", choices=["csv", "xlsx"], default=["csv"])
+    parser.add_argument("--encoding", nargs="+", choices=["utf-8-sig", "cp1255"], default=["utf-8-sig"])
+    parser.add_argument("--no-score", action="store_true")
+    parser.add_argument("--no-manual", action="store_true")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--chat-sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--out")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out) if args.out else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    os.chdir(tempfile.mkdtemp(prefix="bench-"))
+
+    import app
+
+    app.ANALYTICS_DISK_CACHE = False
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        benchmarks = collect(app, args)
+
+    report = {
+        "machine_info": machine_info(),
+        "datetime": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": benchmarks,
+    }
+
+    if baseline:
+        compare(report, baseline)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
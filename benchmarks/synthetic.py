@@ -0,0 +1,117 @@
+"""Synthetic placement-results files with the Hebrew column layout of the app.
+
+    python benchmarks/synthetic.py --rows 100000 --format csv --encoding cp1255 --out results.csv
+
+Label pools grow with the row count (about one site per 40 rows and one
+mentor per 15) and a few percent of the cells are blank, so the files
+exercise the same unknown/unplaced paths as real exports.
+"""
+
+import argparse
+import io
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ["רווחה", "בריאות", "חינוך", "קהילה", "סיכון", "מוגבלויות"]
+CITIES = ["צפת", "חיפה", "עכו", "נהריה", "כרמיאל", "טבריה"]
+MANUAL_CHOICES = ["כן", "לא", "לא", "לא", ""]
+
+
+def generate_frame(rows, seed=0, score=True, manual=True, extra_cols=0, blank_frac=0.02):
+    rnd = np.random.default_rng(seed)
+
+    sites = np.array(
+        [f"מוסד {i}" for i in range(max(5, rows // 40))] + ["לא שובץ"], dtype=object
+    )
+    mentors = np.array([f"מדריך {i}" for i in range(max(5, rows // 15))], dtype=object)
+
+    def with_blanks(values):
+        values = values.astype(object)
+        values[rnd.random(rows) < blank_frac] = ""
+        return values
+
+    data = {
+        "תעודת זהות": (200000000 + rnd.permutation(rows * 2)[:rows]).astype(str),
+        "שם הסטודנט/ית": [f"סטודנט/ית {i}" for i in range(rows)],
+        "שם מקום ההתמחות": with_blanks(rnd.choice(sites, rows)),
+        "תחום התמחות": with_blanks(rnd.choice(np.array(FIELDS, dtype=object), rows)),
+        "שם המדריך/ה": with_blanks(rnd.choice(mentors, rows)),
+        "עיר המוסד": rnd.choice(np.array(CITIES, dtype=object), rows),
+    }
+
+    if score:
+        scores = np.round(rnd.uniform(20, 100, rows), 1).astype(object)
+        scores[rnd.random(rows) < blank_frac] = None
+        data["אחוז התאמה"] = scores
+
+    if manual:
+        data["עודכן ידנית?"] = rnd.choice(np.array(MANUAL_CHOICES, dtype=object), rows)
+
+    for i in range(extra_cols):
+        data[f"שאלה {i}"] = rnd.choice(np.array(["תשובה א", "תשובה ב", "תשובה ג"], dtype=object), rows)
+
+    return pd.DataFrame(data)
+
+
+def write_xlsx(target, df):
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+
+    for row in df.itertuples(index=False, name=None):
+        ws.append([None if isinstance(value, float) and value != value else value for value in row])
+
+    wb.save(target)
+
+
+def write_results_file(target, rows, fmt="csv", encoding="utf-8-sig", **kwargs):
+    df = generate_frame(rows, **kwargs)
+
+    if fmt == "xlsx":
+        write_xlsx(target, df)
+    else:
+        df.to_csv(target, index=False, encoding=encoding)
+
+    return df
+
+
+def results_bytes(rows, fmt="csv", encoding="utf-8-sig", **kwargs):
+    buffer = io.BytesIO()
+
+    if fmt == "xlsx":
+        write_xlsx(buffer, generate_frame(rows, **kwargs))
+    else:
+        buffer.write(generate_frame(rows, **kwargs).to_csv(index=False).encode(encoding))
+
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--encoding", choices=["utf-8-sig", "cp1255"], default="utf-8-sig")
+    parser.add_argument("--no-score", action="store_true")
+    parser.add_argument("--no-manual", action="store_true")
+    parser.add_argument("--extra-cols", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    write_results_file(
+        args.out,
+        args.rows,
+        fmt=args.format,
+        encoding=args.encoding,
+        seed=args.seed,
+        score=not args.no_score,
+        manual=not args.no_manual,
+        extra_cols=args.extra_cols
+    )
+
+
+if __name__ == "__main__":
+    main()
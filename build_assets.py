@@ -0,0 +1,152 @@
+"""Build fingerprinted static assets for production.
+
+    python build_assets.py
+    python build_assets.py --chart-js /path/to/chart.umd.js
+
+Checks the pinned Chart.js committed in static/vendor (or vendors it from
+--chart-js, or downloads it when missing), minifies the CSS and writes every
+asset to static/dist under a content-hashed name, next to .gz and (when the
+brotli package is installed) .br copies. static/dist/manifest.json maps the
+source names to the hashed ones; app.asset_url reads it, and WhiteNoise
+serves the hashed files with immutable one-year caching.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+VENDOR_DIR = os.path.join(STATIC_DIR, "vendor")
+
+CHART_JS_VERSION = "4.4.1"
+CHART_JS_URL = f"https://cdn.jsdelivr.net/npm/chart.js@{CHART_JS_VERSION}/dist/chart.umd.js"
+CHART_JS_FILE = "vendor/chart.umd.js"
+CHART_JS_BANNER = f"Chart.js v{CHART_JS_VERSION}".encode("ascii")
+
+SOURCES = ["css/style.css", CHART_JS_FILE, "images/images.png"]
+COMPRESSIBLE = (".css", ".js", ".svg", ".json")
+HASH_LENGTH = 12
+
+CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+CSS_SPACE_RE = re.compile(r"\s+")
+CSS_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(text):
+    text = CSS_COMMENT_RE.sub("", text)
+    text = CSS_SPACE_RE.sub(" ", text)
+    text = CSS_PUNCT_RE.sub(r"\1", text)
+    text = re.sub(r"([{;])\s*([-\w]+):\s+", r"\1\2:", text)
+
+    return text.replace(";}", "}").strip() + "\n"
+
+
+def is_pinned_chart_js(path):
+    with open(path, "rb") as f:
+        return CHART_JS_BANNER in f.read(512)
+
+
+def vendor_chart_js(local_path=None):
+    target = os.path.join(STATIC_DIR, CHART_JS_FILE)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    if local_path:
+        shutil.copyfile(local_path, target)
+    elif not os.path.exists(target):
+        try:
+            with urllib.request.urlopen(CHART_JS_URL, timeout=30) as response:
+                body = response.read()
+        except OSError as e:
+            print("CHART.JS DOWNLOAD ERROR:", e, file=sys.stderr)
+            return False
+
+        with open(target, "wb") as f:
+            f.write(body)
+
+    if not is_pinned_chart_js(target):
+        print(f"CHART.JS ERROR: {CHART_JS_FILE} is not Chart.js {CHART_JS_VERSION}", file=sys.stderr)
+        return False
+
+    return True
+
+
+def hashed_name(name, body):
+    digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+    base, ext = os.path.splitext(name)
+
+    return f"{base}.{digest}{ext}"
+
+
+def write_compressed(path, body):
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(body, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(body, quality=11))
+
+
+def build(sources):
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    manifest = {}
+
+    for name in sources:
+        source = os.path.join(STATIC_DIR, name)
+
+        if not os.path.exists(source):
+            print(f"skip {name}: not found", file=sys.stderr)
+            continue
+
+        with open(source, "rb") as f:
+            body = f.read()
+
+        if name.endswith(".css"):
+            body = minify_css(body.decode("utf-8")).encode("utf-8")
+
+        output = hashed_name(name, body)
+        target = os.path.join(DIST_DIR, output)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        with open(target, "wb") as f:
+            f.write(body)
+
+        if name.endswith(COMPRESSIBLE):
+            write_compressed(target, body)
+
+        manifest[name] = "dist/" + output
+        print(f"{name} -> dist/{output} ({len(body)} bytes)", file=sys.stderr)
+
+    with open(os.path.join(DIST_DIR, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chart-js", help="local copy of chart.umd.js to vendor instead of downloading it")
+    args = parser.parse_args()
+
+    if not vendor_chart_js(args.chart_js):
+        print(f"Commit the Chart.js {CHART_JS_VERSION} build as static/{CHART_JS_FILE}", file=sys.stderr)
+        return 1
+
+    build(SOURCES)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+import os
+
+wsgi_app = "app:app"
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+
+def when_ready(server):
+    if not preload_app:
+        return
+
+    import app
+
+    app.load_analytics_modules()
+    server.log.info("Preloaded pandas and numpy in the master process")
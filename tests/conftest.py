@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    app_module._analytics_cache.clear()
+    app_module._analytics_state.update(key=None, accumulator=None)
+    app_module._dashboard_stats_cache.update(key=None, stats=None)
+    app_module._history_ready.clear()
+    app_module._snapshot_cache.clear()
+    app_module._latest_snapshot.update(key=None, id=None)
+    app_module._public_pages.clear()
+    app_module._sheets.update(pid=None, worksheet=None)
+    app_module.encoded_snapshot_part.cache_clear()
+    app_module.analytics_table_index.cache_clear()
+
+    yield tmp_path
+
+
+@pytest.fixture
+def client():
+    test_client = app_module.app.test_client()
+
+    with test_client.session_transaction() as session:
+        session["lecturer_email"] = "lecturer@example.com"
+
+    return test_client
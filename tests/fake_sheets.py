@@ -0,0 +1,60 @@
+import re
+
+import app
+
+RANGE_RE = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def render(cell, value_render_option):
+    if isinstance(cell, tuple):
+        formatted, unformatted = cell
+        return unformatted if value_render_option == "UNFORMATTED_VALUE" else formatted
+
+    return cell
+
+
+class FakeWorksheet:
+    def __init__(self, rows, col_count=26):
+        self.rows = rows
+        self.col_count = max([col_count] + [len(row) for row in rows])
+        self.calls = []
+
+    def read_range(self, a1_range, major_dimension, value_render_option):
+        match = RANGE_RE.match(a1_range)
+
+        if not match:
+            raise ValueError(f"Unsupported range: {a1_range}")
+
+        start_col, start_row, end_col, end_row = match.groups(default="")
+
+        if match.group(3) is None:
+            end_col, end_row = start_col, start_row
+
+        first_col = app.column_index(start_col) if start_col else 0
+        last_col = app.column_index(end_col) + 1 if end_col else None
+        first_row = int(start_row) - 1 if start_row else 0
+        last_row = int(end_row) if end_row else None
+
+        values = [
+            [render(cell, value_render_option) for cell in row[first_col:last_col]]
+            for row in self.rows[first_row:last_row]
+        ]
+
+        if major_dimension == "COLUMNS":
+            width = max((len(row) for row in values), default=0)
+            values = [[row[i] if i < len(row) else "" for row in values] for i in range(width)]
+
+        for line in values:
+            while line and line[-1] == "":
+                line.pop()
+
+        while values and not values[-1]:
+            values.pop()
+
+        return values
+
+    def batch_get(self, ranges, major_dimension=None, value_render_option=None):
+        ranges = list(ranges)
+        self.calls.append(ranges)
+
+        return [self.read_range(r, major_dimension, value_render_option) for r in ranges]
@@ -0,0 +1,332 @@
+import gzip
+import io
+import math
+import sqlite3
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import app
+
+
+def test_clean_text_column_matches_safe_text():
+    values = [
+        "  מוסד א ",
+        None,
+        float("nan"),
+        np.nan,
+        pd.NA,
+        pd.NaT,
+        3,
+        2.5,
+        1003.0,
+        " ",
+        "",
+        "\tתחום\n",
+        True,
+        np.float64("nan"),
+    ]
+    series = pd.Series(values, dtype=object)
+
+    cleaned = app.clean_text_column(series)
+
+    assert cleaned.tolist() == [app.safe_text(value) for value in values]
+    assert cleaned.index.equals(series.index)
+
+
+def test_clean_text_column_on_float_column_with_nan():
+    series = pd.Series([1.5, math.nan, 2.0])
+
+    assert app.clean_text_column(series).tolist() == [app.safe_text(v) for v in series]
+
+
+def results_csv(rows):
+    frame = pd.DataFrame(rows, columns=[app.STUDENT_ID_COL, app.SITE_COL, app.FIELD_COL, app.SCORE_COL])
+    return frame.to_csv(index=False).encode("utf-8-sig")
+
+
+def upload(client, data, mode=None, cohort=None):
+    form = {"results_file": (io.BytesIO(data), "results.csv")}
+
+    if mode:
+        form["mode"] = mode
+    if cohort:
+        form["cohort"] = cohort
+
+    return client.post("/analytics", data=form, content_type="multipart/form-data")
+
+
+def test_append_dedups_ids_read_as_float_because_of_blank_cells(client):
+    first = [(1000 + i, "s1", "f1", 80) for i in range(1, 11)]
+    late = [(1009, "s1", "f1", 70), (1010, "s2", "f1", 70), (1011, "s2", "f2", 90), (None, "s3", "f2", 60)]
+
+    assert upload(client, results_csv(first), cohort="2025").status_code == 200
+    assert upload(client, results_csv(late), mode="append").status_code == 200
+
+    state = app.load_analytics_state()
+    assert state.total_rows == 12
+    assert state.student_ids == {str(1000 + i) for i in range(1, 12)}
+
+    assert upload(client, results_csv(late), mode="append").status_code == 200
+
+    app._analytics_state.update(key=None, accumulator=None)
+    state = app.load_analytics_state()
+    assert state.total_rows == 13
+    assert len(state.student_ids) == 11
+
+
+def cache_counts():
+    return (
+        sum(app._metric_counters.get("analytics_cache_hits_total", {}).values()),
+        sum(app._metric_counters.get("analytics_cache_misses_total", {}).values()),
+    )
+
+
+def test_memory_cache_serves_repeat_uploads_without_disk_cache(client, monkeypatch):
+    monkeypatch.setattr(app, "ANALYTICS_DISK_CACHE", False)
+    computed = []
+    compute = app.compute_analytics_state
+
+    def counting_compute(*args, **kwargs):
+        computed.append(1)
+        return compute(*args, **kwargs)
+
+    monkeypatch.setattr(app, "compute_analytics_state", counting_compute)
+    data = results_csv([(1000 + i, f"s{i % 3}", "f1", 70 + i) for i in range(20)])
+    hits, misses = cache_counts()
+
+    summaries = []
+
+    for _ in range(3):
+        assert upload(client, data, cohort="2025").status_code == 200
+        summaries.append(app.load_analytics_snapshot("latest")["summary"])
+
+    assert len(computed) == 1
+    assert summaries[0] == summaries[1] == summaries[2]
+    assert cache_counts() == (hits + 2, misses + 1)
+    assert app.load_analytics_state().total_rows == 20
+
+
+def test_cache_entry_without_state_is_a_miss(client, monkeypatch):
+    monkeypatch.setattr(app, "ANALYTICS_DISK_CACHE", False)
+    data = results_csv([(1, "s1", "f1", 80)])
+    assert upload(client, data, cohort="2025").status_code == 200
+
+    for key, (payload, _) in list(app._analytics_cache.items()):
+        app._analytics_cache[key] = (payload, None)
+
+    hits, misses = cache_counts()
+    assert upload(client, data, cohort="2025").status_code == 200
+    assert cache_counts() == (hits, misses + 1)
+
+
+def test_append_with_other_cohort_is_rejected(client):
+    assert upload(client, results_csv([(1, "s1", "f1", 80), (2, "s1", "f1", 90)]), cohort="2024").status_code == 200
+
+    response = upload(client, results_csv([(3, "s2", "f1", 70)]), mode="append", cohort="2025")
+
+    assert response.status_code == 400
+    assert app.load_analytics_state().total_rows == 2
+    assert [c["cohort"] for c in app.history_cohorts()] == ["2024"]
+
+    assert upload(client, results_csv([(3, "s2", "f1", 70)]), mode="append", cohort="2024").status_code == 200
+    cohort = app.history_cohorts()[0]
+    assert (cohort["total_rows"], cohort["total_students"]) == (3, 3)
+
+    conn = app.history_connection()
+    placements = conn.execute("SELECT COUNT(*) FROM placements").fetchone()[0]
+    sites = dict(conn.execute("SELECT site, students FROM cohort_sites").fetchall())
+    conn.close()
+    assert placements == 3
+    assert sites == {"s1": 2, "s2": 1}
+
+
+def test_history_recorder_does_not_hold_the_write_lock_while_parsing():
+    frame = app.prepare_analytics_frame(pd.read_csv(io.BytesIO(results_csv([(1, "s1", "f1", 80)]))))
+    app.history_connection().close()
+    slow = app.HistoryRecorder("2024")
+    slow.add_frame(frame)
+
+    other = sqlite3.connect(app.HISTORY_DB_FILE, timeout=0, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    other.execute("ROLLBACK")
+    other.close()
+
+    fast = app.HistoryRecorder("2025")
+    fast.add_frame(frame)
+    fast.finish(app.aggregate_analytics_frame(frame))
+
+    slow.finish(app.aggregate_analytics_frame(frame))
+    assert sorted(c["cohort"] for c in app.history_cohorts()) == ["2024", "2025"]
+
+
+def test_streamed_upload_stages_history_rows_outside_python(client, monkeypatch):
+    monkeypatch.setattr(app, "ANALYTICS_STREAM_THRESHOLD", 0)
+    monkeypatch.setattr(app, "ANALYTICS_CHUNK_ROWS", 100)
+    staged = []
+    add_frame = app.HistoryRecorder.add_frame
+
+    def staging_add_frame(self, df):
+        add_frame(self, df)
+        staged.append(self.conn.execute("SELECT COUNT(*) FROM temp.staged_placements").fetchone()[0])
+        assert not [value for value in vars(self).values() if isinstance(value, (list, tuple))]
+
+    monkeypatch.setattr(app.HistoryRecorder, "add_frame", staging_add_frame)
+    data = results_csv([(i, f"s{i % 7}", "f1", 60 + i % 40) for i in range(1, 1001)])
+
+    assert upload(client, data, cohort="2025").status_code == 200
+
+    assert staged == list(range(100, 1001, 100))
+    conn = app.history_connection()
+    assert conn.execute("SELECT COUNT(*) FROM placements").fetchone()[0] == 1000
+    conn.close()
+
+
+def test_failed_history_write_fails_the_upload(client):
+    app.history_connection().execute("DROP TABLE cohort_sites")
+
+    response = upload(client, results_csv([(1, "s1", "f1", 80)]), cohort="2025")
+
+    assert response.status_code == 500
+    assert app.load_analytics_state().total_rows == 0
+    assert app.history_cohorts() == []
+
+
+def test_xlsx_reader_matches_pandas_on_the_analytics_columns():
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append([app.STUDENT_ID_COL, None, app.SITE_COL, "שאלה", app.FIELD_COL, app.SCORE_COL, "שאלה"])
+    sheet.append([1003, "x", "מוסד א", "כן", "רווחה", 85.0, "לא"])
+    sheet.append([])
+    sheet.append([1004, None, "מוסד ב", None, "חינוך", "#N/A", None])
+    sheet.append([None, None, None, None, None, None, "רק שאלה"])
+    sheet.append([None] * 7)
+    data = io.BytesIO()
+    workbook.save(data)
+
+    header = []
+
+    def is_analytics_column(name):
+        header.append(name)
+        return app.normalize_column_name(name) in app.ANALYTICS_ALIAS_INDEX
+
+    expected = pd.read_excel(io.BytesIO(data.getvalue()), usecols=is_analytics_column)
+    result = app.read_uploaded_excel(FileStorage(io.BytesIO(data.getvalue()), filename="results.xlsx"))
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert app.excel_header_names(next(sheet.iter_rows(max_row=1, values_only=True))) == header
+
+
+def test_repeat_upload_after_another_file_is_served_from_the_cache(client, monkeypatch):
+    computed = []
+    compute = app.compute_analytics_state
+
+    def counting_compute(*args, **kwargs):
+        computed.append(1)
+        return compute(*args, **kwargs)
+
+    monkeypatch.setattr(app, "compute_analytics_state", counting_compute)
+    first = results_csv([(i, f"s{i % 3}", "f1", 70 + i) for i in range(1, 21)])
+    second = results_csv([(i, "other", "f2", 50) for i in range(100, 105)])
+
+    for data in (first, second, first):
+        assert upload(client, data, cohort="2025").status_code == 200
+
+    assert len(computed) == 2
+    cohort = app.history_cohorts()[0]
+    assert (cohort["cohort"], cohort["total_rows"]) == ("2025", 20)
+
+    conn = app.history_connection()
+    placements = conn.execute("SELECT COUNT(*), COUNT(DISTINCT site) FROM placements").fetchone()
+    sites = dict(conn.execute("SELECT site, students FROM cohort_sites").fetchall())
+    conn.close()
+    assert placements == (20, 3)
+    assert sites == {"s0": 6, "s1": 7, "s2": 7}
+
+
+def test_history_copies_beyond_the_limit_fall_back_to_recomputing(client, monkeypatch):
+    monkeypatch.setattr(app, "HISTORY_SOURCES_KEEP", 0)
+    first = results_csv([(1, "s1", "f1", 80)])
+    second = results_csv([(2, "s2", "f1", 90)])
+
+    for data in (first, second, first):
+        assert upload(client, data, cohort="2025").status_code == 200
+
+    conn = app.history_connection()
+    copies = conn.execute("SELECT COUNT(DISTINCT source) FROM source_placements").fetchone()[0]
+    sites = [row[0] for row in conn.execute("SELECT site FROM placements")]
+    conn.close()
+    assert copies == 1
+    assert sites == ["s1"]
+
+
+def test_snapshot_etags_round_trip_to_304(client):
+    upload(client, results_csv([[1, "s1", "f1", 80], [2, "s2", "f1", 90]]), cohort="2025")
+    url = "/api/analytics/latest/summary"
+
+    plain = client.get(url)
+    assert plain.status_code == 200
+    assert client.get(url, headers={"If-None-Match": plain.headers["ETag"]}).status_code == 304
+
+    zipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    assert gzip.decompress(zipped.data) == plain.data
+
+    repeat = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]})
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+
+    other = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["ETag"]})
+    assert other.status_code == 200
+
+
+
+SITES = [
+    {"מקום": "בית חולים צפון", "ציון": "81.0%"},
+    {"מקום": "מרפאת הילדים", "ציון": "95.5%"},
+    {"מקום": "בית ספר דרום", "ציון": "70.0%"},
+    {"מקום": "מרכז יום", "ציון": "88.0%"},
+    {"מקום": "בית אבות", "ציון": "90.0%"},
+]
+
+
+@pytest.fixture
+def sites_index(monkeypatch):
+    monkeypatch.setattr(app, "load_analytics_snapshot", lambda snapshot_id: {"tables": {"sites": SITES}})
+    return app.analytics_table_index("20250101-000000-abcdef", "sites")
+
+
+def site_names(result):
+    return [row[0] for row in result["rows"]]
+
+
+def test_table_pages_are_clamped_to_valid_bounds(sites_index):
+    last = app.query_analytics_table(sites_index, page=3, limit=2)
+    assert site_names(last) == ["בית אבות"]
+    assert (last["total"], last["pages"]) == (5, 3)
+
+    assert app.query_analytics_table(sites_index, page=4, limit=2)["rows"] == []
+    assert app.query_analytics_table(sites_index, page=0, limit=2)["page"] == 1
+    assert app.query_analytics_table(sites_index, limit=0)["limit"] == 1
+    assert app.query_analytics_table(sites_index, limit=10 ** 6)["limit"] == app.ANALYTICS_TABLE_MAX_PAGE_SIZE
+
+    by_score = app.query_analytics_table(sites_index, page=2, limit=2, sort=1, descending=True)
+    assert site_names(by_score) == ["מרכז יום", "בית חולים צפון"]
+    assert app.query_analytics_table(sites_index, sort=7) == app.query_analytics_table(sites_index)
+
+
+def test_table_search_matches_word_prefixes(sites_index):
+    assert site_names(app.query_analytics_table(sites_index, prefix="בית", sort=1)) == [
+        "בית ספר דרום", "בית חולים צפון", "בית אבות"
+    ]
+    assert site_names(app.query_analytics_table(sites_index, prefix="צפו")) == ["בית חולים צפון"]
+    assert site_names(app.query_analytics_table(sites_index, prefix="הילדים")) == ["מרפאת הילדים"]
+    assert app.query_analytics_table(sites_index, prefix="ילדים")["total"] == 0
+
+    page = app.query_analytics_table(sites_index, prefix="בית", page=2, limit=2, sort=0)
+    assert site_names(page) == ["בית ספר דרום"]
+    assert (page["total"], page["pages"]) == (3, 2)
@@ -0,0 +1,50 @@
+import pytest
+
+import app
+from benchmarks.bench_chat import nested_scan
+
+KNOWLEDGE = app.DEFAULT_CHAT_KNOWLEDGE
+
+
+def answer_index(message):
+    item = app.ChatIndex(KNOWLEDGE).best_match(message)
+    return KNOWLEDGE.index(item) if item else None
+
+
+def test_masculine_plurals_share_the_singular_stem():
+    assert app.tokenize_keywords("מדריכים") == app.tokenize_keywords("מדריך")
+    assert app.tokenize_keywords("גרפים") == app.tokenize_keywords("גרף")
+    assert app.tokenize_keywords("שאלונים") == app.tokenize_keywords("שאלון")
+
+
+@pytest.mark.parametrize("message", ["מדריכים", "למדריכים", "והמדריך", "מדריך"])
+def test_plural_prefix_and_final_letter_forms_match_the_same_entry(message):
+    index = app.ChatIndex([{"keywords": ["מדריך"], "answer": "mentor"}])
+
+    assert index.best_match(message)["answer"] == "mentor"
+
+
+def test_multi_word_keywords_match_only_as_phrases():
+    index = app.ChatIndex([{"keywords": ["איך זה עובד"], "answer": "process"}])
+
+    assert index.best_match("איך זה עובד?")["answer"] == "process"
+    assert index.best_match("איך רואים גרפים") is None
+
+
+@pytest.mark.parametrize("message", [
+    "איך רואים גרפים",
+    "איך עובד השיבוץ",
+    "איך זה עובד?",
+    "מה עם המדריכים",
+    "איפה ממלאים שאלון סטודנט",
+    "רוצה לראות גרפים",
+    "מה הסטטוס",
+    "מיפוי מקומות התמחות",
+    "דוח סטטיסטיקה",
+    "תהליך השיבוץ",
+])
+def test_routing_matches_the_substring_matcher(message):
+    old = nested_scan(KNOWLEDGE, message.lower())
+
+    assert old is not None
+    assert answer_index(message) == KNOWLEDGE.index(old)
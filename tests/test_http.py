@@ -0,0 +1,54 @@
+import json
+import logging
+import os
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def access_records(monkeypatch):
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    monkeypatch.setattr(app.access_logger, "handlers", [handler])
+
+    level = app.access_logger.level
+    yield records
+    app.access_logger.setLevel(level)
+
+
+def test_requests_are_logged_through_the_access_logger(client, access_records, capsys):
+    client.get("/")
+
+    event = json.loads(access_records[-1].getMessage())
+    assert access_records[-1].levelno == logging.INFO
+    assert (event["event"], event["path"], event["status"]) == ("request", "/", 200)
+    assert capsys.readouterr().out == ""
+
+
+def test_access_log_level_silences_request_lines(client, access_records):
+    app.access_logger.setLevel(logging.WARNING)
+
+    client.get("/")
+
+    assert access_records == []
+
+
+def test_maintenance_file_turns_pages_into_503(client, monkeypatch):
+    monkeypatch.setattr(app, "MAINTENANCE_CHECK_SECONDS", 0)
+    monkeypatch.setitem(app._maintenance, "file", False)
+    assert client.get("/").status_code == 200
+
+    os.makedirs(os.path.dirname(app.MAINTENANCE_FILE), exist_ok=True)
+    open(app.MAINTENANCE_FILE, "w").close()
+
+    response = client.get("/")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "300"
+    assert response.data == app.MAINTENANCE_PAGE
+    assert client.get("/login").status_code == 200
+
+    os.remove(app.MAINTENANCE_FILE)
+    assert client.get("/").status_code == 200
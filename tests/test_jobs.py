@@ -0,0 +1,73 @@
+import io
+import os
+import time
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import app
+
+CSV = "\n".join(
+    [",".join([app.STUDENT_ID_COL, app.SITE_COL, app.FIELD_COL, app.SCORE_COL])]
+    + [f"{i},s{i % 3},f1,{60 + i}" for i in range(1, 10)]
+).encode("utf-8-sig")
+
+
+def raising_job(*args, **kwargs):
+    raise ValueError("הקובץ פגום")
+
+
+def crashing_job(*args, **kwargs):
+    os._exit(1)
+
+
+@pytest.fixture(autouse=True)
+def fresh_executor():
+    yield
+
+    executor = app._analytics_executor
+    app._analytics_executor = None
+
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def run_job(monkeypatch, job):
+    monkeypatch.setattr(app, "run_analytics_job", job)
+
+    uploaded = FileStorage(io.BytesIO(CSV), filename="results.csv")
+    job_id = app.submit_analytics_job(uploaded, cohort="2025")["id"]
+    error = app._analytics_futures[job_id].exception(timeout=60)
+    deadline = time.time() + 10
+
+    while app.load_analytics_job(job_id)["status"] != "error" and time.time() < deadline:
+        time.sleep(0.05)
+
+    return job_id, error
+
+
+def test_a_raising_worker_marks_the_job_failed(monkeypatch):
+    job_id, error = run_job(monkeypatch, raising_job)
+    executor = app._analytics_executor
+
+    assert isinstance(error, ValueError)
+    assert app.load_analytics_job(job_id)["status"] == "error"
+    assert app.load_analytics_job(job_id)["error"] == "הקובץ פגום"
+    assert app._analytics_executor is executor
+    assert os.listdir(app.ANALYTICS_UPLOADS_DIR) == []
+
+
+def test_a_crashed_worker_resets_the_broken_pool(monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    job_id, error = run_job(monkeypatch, crashing_job)
+
+    assert isinstance(error, BrokenProcessPool)
+    assert app.load_analytics_job(job_id)["status"] == "error"
+    assert app._analytics_executor is None
+    assert os.listdir(app.ANALYTICS_UPLOADS_DIR) == []
+
+    job_id, error = run_job(monkeypatch, raising_job)
+
+    assert isinstance(error, ValueError)
+    assert app.load_analytics_job(job_id)["status"] == "error"
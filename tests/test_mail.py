@@ -0,0 +1,149 @@
+import json
+import socketserver
+import threading
+
+import pytest
+
+import app
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        stub = self.server
+        stub.connections += 1
+        self.reply("220 stub ready")
+
+        while True:
+            line = self.rfile.readline()
+
+            if not line:
+                return
+
+            command = line.decode("ascii", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-stub")
+                self.reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                self.reply("235 accepted")
+            elif verb == "RCPT" and "refused" in command:
+                self.reply("550 no such user")
+            elif verb == "DATA":
+                if stub.drops:
+                    stub.drops -= 1
+                    return
+
+                self.reply("354 go ahead")
+                data = b""
+
+                while not data.endswith(b"\r\n.\r\n"):
+                    data += self.rfile.readline()
+
+                stub.messages.append(data)
+                self.reply("250 queued")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.connections = 0
+        self.drops = 0
+        self.messages = []
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    stub = SMTPStub()
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(app, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(app, "SMTP_PORT", stub.server_address[1])
+    monkeypatch.setattr(app, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(app, "SMTP_USER", None)
+    monkeypatch.setattr(app, "SMTP_PASS", None)
+    monkeypatch.setattr(app, "FROM_EMAIL", "noreply@example.com")
+    monkeypatch.setattr(app, "MAIL_RETRY_DELAY", 0)
+    monkeypatch.setattr(app, "MAIL_MAX_ATTEMPTS", 3)
+
+    yield stub
+
+    stub.shutdown()
+    stub.server_close()
+
+
+@pytest.fixture
+def sender(smtp):
+    mail_sender = app.MailSender()
+    yield mail_sender
+    mail_sender.stop()
+
+
+def send(sender, *recipients):
+    for to in recipients:
+        sender.enqueue(app.build_reset_email(to, "http://localhost/reset"))
+
+    sender.queue.join()
+
+
+def dead_letters():
+    with open(app.MAIL_DEAD_LETTER_FILE, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_messages_share_one_connection(smtp, sender):
+    send(sender, *[f"user{i}@example.com" for i in range(5)])
+
+    assert len(smtp.messages) == 5
+    assert smtp.connections == 1
+
+
+def test_sender_reconnects_after_the_server_drops(smtp, sender):
+    send(sender, "first@example.com")
+    smtp.drops = 1
+
+    send(sender, "second@example.com")
+
+    assert len(smtp.messages) == 2
+    assert smtp.connections == 2
+
+
+def test_refused_and_undeliverable_mail_is_dead_lettered(smtp, sender):
+    send(sender, "refused@example.com")
+    smtp.drops = 3
+    send(sender, "down@example.com")
+
+    assert [(d["to"], d["attempts"]) for d in dead_letters()] == [
+        ("refused@example.com", 1),
+        ("down@example.com", 3),
+    ]
+
+    send(sender, "after@example.com")
+    assert len(smtp.messages) == 1
+
+
+def test_unexpected_errors_do_not_stop_the_sender(smtp, sender, monkeypatch):
+    monkeypatch.setattr(app, "SMTP_USER", "lecturer")
+    monkeypatch.setattr(app, "SMTP_PASS", "סיסמה")
+
+    send(sender, "unicode@example.com")
+
+    assert [d["to"] for d in dead_letters()] == ["unicode@example.com"]
+    assert sender.thread.is_alive()
+
+    monkeypatch.setattr(app, "SMTP_PASS", "secret")
+    send(sender, "after@example.com")
+
+    assert len(smtp.messages) == 1
@@ -0,0 +1,77 @@
+import pytest
+
+import app
+from fake_sheets import FakeWorksheet
+
+HEADER = [app.STUDENT_ID_COL, "הערות", app.SITE_COL, app.FIELD_COL, app.SCORE_COL]
+
+
+@pytest.fixture
+def worksheet(monkeypatch):
+    sheet = FakeWorksheet([HEADER])
+    monkeypatch.setattr(app, "sheets_worksheet", lambda: sheet)
+    return sheet
+
+
+def sheet_rows(first, count):
+    return [[str(i), "", f"s{i % 3}", "f1", str(60 + i % 40)] for i in range(first, first + count)]
+
+
+def test_incremental_sync_reads_only_new_rows(client, worksheet):
+    worksheet.rows += sheet_rows(1, 20)
+
+    response = client.post("/analytics/sheet-sync", data={"cohort": "2025"})
+    assert response.status_code == 200
+    assert "נקלטו 20 שורות" in response.get_data(as_text=True)
+
+    worksheet.rows += sheet_rows(21, 5)
+    worksheet.calls.clear()
+
+    response = client.post("/analytics/sheet-sync")
+    assert "נקלטו 5 שורות" in response.get_data(as_text=True)
+    assert worksheet.calls == [["1:1", "A22:A", "C22:C", "D22:D", "E22:E"]]
+
+    state = app.load_analytics_state()
+    assert state.total_rows == 25
+    assert state.cohort == "2025"
+
+    worksheet.calls.clear()
+    response = client.post("/analytics/sheet-sync")
+    assert response.status_code == 302
+    assert len(worksheet.calls) == 1
+    assert app.load_analytics_state().total_rows == 25
+
+
+def test_sync_rebuilds_after_the_header_changes(client, worksheet):
+    worksheet.rows += sheet_rows(1, 10)
+    client.post("/analytics/sheet-sync", data={"cohort": "2025"})
+
+    worksheet.rows[0] = ["הערות"] + HEADER[:1] + HEADER[2:]
+    worksheet.rows[1:] = [[row[1], row[0]] + row[2:] for row in worksheet.rows[1:]]
+
+    response = client.post("/analytics/sheet-sync", data={"cohort": "2025"})
+
+    assert "נקלטו 10 שורות" in response.get_data(as_text=True)
+    assert app.load_analytics_state().total_rows == 10
+
+
+def test_first_sync_reads_the_sheet_in_one_call(client, worksheet):
+    worksheet.rows += sheet_rows(1, 10)
+
+    client.post("/analytics/sheet-sync", data={"cohort": "2025"})
+
+    assert worksheet.calls == [["1:1", "A2:Z"]]
+    assert app.load_analytics_state().total_rows == 10
+
+
+def test_percent_scores_are_read_as_displayed(client, worksheet):
+    worksheet.rows += [
+        ["1", "", "s1", "f1", ("85%", 0.85)],
+        ["2", "", "s1", "f1", ("95%", 0.95)],
+        ["3", "", "s2", "f1", ("70", 70)],
+    ]
+
+    client.post("/analytics/sheet-sync", data={"cohort": "2025"})
+
+    summary = app.load_analytics_snapshot("latest")["summary"]
+    assert summary["avg_score"] == "83.3%"
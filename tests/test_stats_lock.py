@@ -0,0 +1,90 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+import app
+
+WRITERS = 6
+INCREMENTS = 40
+
+
+def increment_counter(path, lock_path, times):
+    for _ in range(times):
+        with app.file_lock(lock_path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            data["count"] += 1
+            data["padding"] = "x" * (1000 + data["count"])
+            app.write_json_atomic(path, data)
+
+
+def read_until_done(path, done, errors):
+    while not done.is_set():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                json.load(f)
+        except ValueError:
+            with errors.get_lock():
+                errors.value += 1
+
+
+@pytest.mark.skipif(app.fcntl is None, reason="fcntl locks are POSIX only")
+def test_concurrent_writers_do_not_lose_or_tear_updates():
+    ctx = multiprocessing.get_context("fork")
+    path = os.path.abspath("counter.json")
+    lock_path = os.path.abspath("counter.lock")
+    app.write_json_atomic(path, {"count": 0, "padding": ""})
+
+    done = ctx.Event()
+    errors = ctx.Value("i", 0)
+    reader = ctx.Process(target=read_until_done, args=(path, done, errors))
+    writers = [
+        ctx.Process(target=increment_counter, args=(path, lock_path, INCREMENTS))
+        for _ in range(WRITERS)
+    ]
+
+    reader.start()
+
+    for writer in writers:
+        writer.start()
+
+    for writer in writers:
+        writer.join(60)
+        assert writer.exitcode == 0
+
+    done.set()
+    reader.join(10)
+
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f)["count"] == WRITERS * INCREMENTS
+
+    assert errors.value == 0
+    assert not [name for name in os.listdir(".") if name.endswith(".tmp")]
+
+
+def save_stats_repeatedly(times, marker):
+    for i in range(times):
+        app.save_dashboard_stats({"registered_students": marker * 1000 + i})
+
+
+@pytest.mark.skipif(app.fcntl is None, reason="fcntl locks are POSIX only")
+def test_concurrent_dashboard_saves_leave_a_complete_file():
+    ctx = multiprocessing.get_context("fork")
+    app.ensure_data_dir()
+    writers = [ctx.Process(target=save_stats_repeatedly, args=(25, marker)) for marker in range(4)]
+
+    for writer in writers:
+        writer.start()
+
+    for writer in writers:
+        writer.join(60)
+        assert writer.exitcode == 0
+
+    with open(app.STATS_FILE, "r", encoding="utf-8") as f:
+        stats = json.load(f)
+
+    assert stats["registered_students"] % 1000 == 24
+    assert app.load_dashboard_stats()["registered_students"] == stats["registered_students"]
@@ -0,0 +1,110 @@
+import io
+
+import pytest
+
+import app
+
+CSV = "\n".join(
+    [",".join([app.STUDENT_ID_COL, app.SITE_COL, app.FIELD_COL, app.SCORE_COL])]
+    + [f"{i},s{i % 3},f1,{60 + i}" for i in range(1, 30)]
+).encode("utf-8-sig")
+
+
+def start_upload(client, data=CSV):
+    return client.post("/api/uploads", json={"filename": "results.csv", "size": len(data)}).get_json()
+
+
+def send_all(client, upload, data=CSV):
+    response = client.patch(upload["upload_url"], data=data, headers={"Upload-Offset": "0"})
+    assert response.status_code == 200
+
+
+def test_oversized_chunk_gets_a_chunk_specific_413(client, monkeypatch):
+    monkeypatch.setattr(app, "UPLOAD_CHUNK_BYTES", 64)
+    upload = start_upload(client)
+
+    response = client.patch(upload["upload_url"], data=CSV[:65], headers={"Upload-Offset": "0"})
+
+    assert response.status_code == 413
+    assert response.get_json()["error"] == app.upload_chunk_too_large_message()
+    assert client.get(upload["upload_url"]).get_json()["offset"] == 0
+
+
+@pytest.mark.parametrize("error, status", [
+    (app.AnalyticsQueueFull("busy"), 429),
+    (RuntimeError("חסרה ספריית openpyxl"), 500),
+    (ValueError("bad file"), 400),
+])
+def test_complete_maps_only_a_full_queue_to_429(client, monkeypatch, error, status):
+    def failing_analysis(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(app, "analyze_results_file", failing_analysis)
+    upload = start_upload(client)
+    send_all(client, upload)
+
+    response = client.post(upload["complete_url"])
+
+    assert response.status_code == status
+
+
+def test_job_endpoints_return_429_when_the_queue_is_full(client, monkeypatch):
+    monkeypatch.setitem(app.app.config, "ANALYTICS_ASYNC", True)
+    monkeypatch.setattr(app, "pending_analytics_jobs", lambda: app.ANALYTICS_MAX_PENDING_JOBS)
+
+    response = client.post(
+        "/api/analytics/jobs",
+        data={"results_file": (io.BytesIO(CSV), "results.csv")},
+        content_type="multipart/form-data"
+    )
+    assert response.status_code == 429
+
+    upload = start_upload(client)
+    send_all(client, upload)
+    assert client.post(upload["complete_url"]).status_code == 429
+
+
+def test_job_endpoint_reports_other_failures_as_500(client, monkeypatch):
+    def failing_submit(*args, **kwargs):
+        raise RuntimeError("disk error")
+
+    monkeypatch.setattr(app, "submit_analytics_job", failing_submit)
+
+    response = client.post(
+        "/api/analytics/jobs",
+        data={"results_file": (io.BytesIO(CSV), "results.csv")},
+        content_type="multipart/form-data"
+    )
+
+    assert response.status_code == 500
+
+
+def test_upload_survives_a_full_queue_and_complete_can_be_retried(client, monkeypatch):
+    monkeypatch.setitem(app.app.config, "ANALYTICS_ASYNC", True)
+    monkeypatch.setattr(app, "pending_analytics_jobs", lambda: app.ANALYTICS_MAX_PENDING_JOBS)
+    upload = start_upload(client)
+    send_all(client, upload)
+
+    response = client.post(upload["complete_url"])
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+    assert client.get(upload["upload_url"]).get_json()["offset"] == len(CSV)
+
+    monkeypatch.setitem(app.app.config, "ANALYTICS_ASYNC", False)
+    response = client.post(upload["complete_url"], data={"cohort": "2025"})
+
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "done"
+    assert client.get(upload["upload_url"]).status_code == 404
+
+
+def test_upload_is_discarded_when_the_file_cannot_be_analyzed(client, monkeypatch):
+    def failing_analysis(*args, **kwargs):
+        raise ValueError("bad file")
+
+    monkeypatch.setattr(app, "analyze_results_file", failing_analysis)
+    upload = start_upload(client)
+    send_all(client, upload)
+
+    assert client.post(upload["complete_url"]).status_code == 400
+    assert client.get(upload["upload_url"]).status_code == 404